@@ -1,5 +1,6 @@
 import jwt
 from .models import User
+from .cache import get_user_auth_state
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from .utils import JWTManager
@@ -24,8 +25,34 @@ class CustomJWTAuthentication(BaseAuthentication):
         except Exception as e:
             raise AuthenticationFailed(str(e))
 
-        user_id = decoded_payload.get('user_id')
+        if JWTManager.USER_CLAIMS_AUTH and 'token_version' in decoded_payload:
+            user = self.get_user_from_claims(decoded_payload)
+        else:
+            user = self.get_user_from_db(decoded_payload.get('user_id'))
 
+        from config import context_storage
+        context_storage.set_current_user(user)
+        return (user, decoded_payload)
+
+    def get_user_from_claims(self, claims):
+        """
+        Builds the user from the token claims; only the cached
+        (token_version, is_active) state is looked up, never the users table row.
+        """
+        state = get_user_auth_state(claims.get('user_id'))
+        if state is None:
+            raise AuthenticationFailed('User not found.')
+
+        if not state["is_active"]:
+            raise AuthenticationFailed('User is inactive.')
+
+        if state["token_version"] != claims['token_version']:
+            raise AuthenticationFailed('Token has been revoked.')
+
+        return User.from_token_claims(claims)
+
+    def get_user_from_db(self, user_id):
+        """Legacy path for tokens issued without user claims."""
         try:
             user = User.objects.get(id=user_id)
         except User.DoesNotExist:
@@ -33,10 +60,7 @@ class CustomJWTAuthentication(BaseAuthentication):
         
         if not user.is_active:
             raise AuthenticationFailed('User is inactive.')
-
-        from config import context_storage
-        context_storage.set_current_user(user)
-        return (user, decoded_payload)
+        return user
 
     def authenticate_header(self, request):
         """
@@ -0,0 +1,29 @@
+import uuid
+from typing import Optional
+from django.conf import settings
+from helper.cache import TieredCache
+from .models import User
+
+
+# Revocations apply at once on the worker that saved the user and within
+# AUTH_CACHE_LOCAL_TTL_SECONDS on the others.
+user_auth_cache = TieredCache(
+    prefix="user_auth",
+    ttl=settings.USER_AUTH_CACHE_TTL_SECONDS,
+    local_ttl=settings.AUTH_CACHE_LOCAL_TTL_SECONDS,
+    negative_ttl=settings.USER_AUTH_CACHE_NEGATIVE_TTL_SECONDS,
+    max_entries=settings.USER_AUTH_CACHE_LOCAL_MAX_ENTRIES,
+)
+
+
+def get_user_auth_state(user_id) -> Optional[dict]:
+    """`{"token_version", "is_active"}` for the user through the shared cache; None if the user does not exist."""
+    try:
+        user_id = str(uuid.UUID(str(user_id)))
+    except ValueError:
+        return None
+
+    return user_auth_cache.get_or_load(
+        user_id,
+        lambda: User.objects.filter(id=user_id).values("token_version", "is_active").first()
+    )
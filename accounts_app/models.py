@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser
 from helper.models import UUIDPrimaryKey, IsActiveModel, TimeLine
@@ -14,9 +15,14 @@ class User(UUIDPrimaryKey, IsActiveModel, AbstractBaseUser):
     last_name = models.CharField(max_length=30)
 
     date_joined = models.DateTimeField(auto_now_add=True)
+    # Carried in access tokens; bumping it revokes every token issued before.
+    token_version = models.PositiveIntegerField(default=0)
 
     objects : UserManager = UserManager()
 
+    # Set on users built from token claims, which must never be written back.
+    is_token_principal = False
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name"]
 
@@ -27,6 +33,58 @@ class User(UUIDPrimaryKey, IsActiveModel, AbstractBaseUser):
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
 
+    def save(self, *args, **kwargs):
+        if self.is_token_principal:
+            raise TypeError("Users built from token claims cannot be saved; load the row first.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        if self.is_token_principal:
+            raise TypeError("Users built from token claims cannot be deleted; load the row first.")
+        return super().delete(*args, **kwargs)
+
+    def revoke_tokens(self):
+        """Invalidates every token issued so far; takes effect when the user is saved."""
+        self.token_version += 1
+
+    def create_tokens(self) -> dict:
+        from .utils import JWTManager
+        claims = self.token_claims()
+        return {
+            "access": JWTManager.create_access_token(claims),
+            "refresh": JWTManager.create_refresh_token(claims),
+        }
+
+    def token_claims(self) -> dict:
+        """User attributes carried in access tokens, enough to authenticate without a query."""
+        return {
+            "user_id": str(self.id),
+            "email": self.email,
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "token_version": self.token_version,
+        }
+
+    @classmethod
+    def from_token_claims(cls, claims: dict) -> "User":
+        """
+        Unloaded User built from access-token claims. Fine for identity, FKs and
+        permission lookups; load the row before reading other fields. Saving or
+        deleting it raises, so stale claims can never overwrite the row.
+        """
+        user = cls(
+            id=uuid.UUID(claims["user_id"]),
+            email=claims.get("email", ""),
+            first_name=claims.get("first_name", ""),
+            last_name=claims.get("last_name", ""),
+            token_version=claims["token_version"],
+            is_active=True,
+        )
+        user._state.adding = False
+        user._state.db = "default"
+        user.is_token_principal = True
+        return user
+
 
 class Invitation(UUIDPrimaryKey, TimeLine):
     from_email = models.EmailField(
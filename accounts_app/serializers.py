@@ -132,16 +132,10 @@ class LoginSerializer(serializers.Serializer):
                 dev_message=f"Login attempt for deactivated account {email}"
             )
 
-        payload = {"user_id": str(user.id),}
-        access_token = JWTManager.create_access_token(payload)
-        refresh_token = JWTManager.create_refresh_token(payload)
         user_data = UserSerializer(user).data
         
         login_data['user'] = user_data
-        login_data['tokens'] = {
-            "access" : access_token,
-            "refresh" : refresh_token
-        }
+        login_data['tokens'] = user.create_tokens()
         return login_data
     
     
@@ -227,6 +221,9 @@ class ChangePasswordSerializer(serializers.Serializer):
         if not user:
             raise SmoothException.error("User not found.", "No user on request.")
 
+        # request.user may be built from token claims; load the row to check and save the password.
+        user = models.User.objects.get(pk=user.pk)
+
         if not user.check_password(data.get("old_password")):
             raise SmoothException.error(
                 "Incorrect old password.",
@@ -234,7 +231,11 @@ class ChangePasswordSerializer(serializers.Serializer):
             )
 
         user.set_password(data.get("new_password"))
+        user.revoke_tokens()
         user.save()
+
+        # The caller's own token was revoked with the rest; hand out new ones
+        data["tokens"] = user.create_tokens()
         return data
 
 
@@ -266,6 +267,7 @@ class ResetPasswordSerializer(serializers.Serializer):
             raise SmoothException.error("User not found.", f"No user for session.")
 
         user.set_password(data.get("new_password"))
+        user.revoke_tokens()
         user.save()
         return data
 
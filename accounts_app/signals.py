@@ -1,6 +1,7 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from . import models
+from .cache import user_auth_cache
 from orgs_app.models import Organization, OrganizationMember
 
 
@@ -26,3 +27,12 @@ def setup_user_organization(sender, instance: models.User, created, **kwargs):
             user = instance,
             role = OrganizationMember.Roles.ORG_OWNER
         )
+
+
+@receiver([post_save, post_delete], sender=models.User)
+def invalidate_user_auth_cache(sender, instance: models.User, **kwargs):
+    """
+    Drops the cached token version / active flag so revocations apply on this
+    worker immediately (and on the others once their short local TTL runs out).
+    """
+    user_auth_cache.invalidate(str(instance.pk))
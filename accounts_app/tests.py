@@ -0,0 +1,123 @@
+import jwt
+from unittest import mock
+from django.conf import settings
+from django.test import RequestFactory, TestCase
+from rest_framework.exceptions import AuthenticationFailed
+from helper.utils import create_session
+from .authentication import CustomJWTAuthentication
+from .models import User
+from .serializers import ChangePasswordSerializer, ResetPasswordSerializer
+from .utils import JWTManager
+
+
+class ClaimsAuthenticationTests(TestCase):
+    """Access tokens carry the user claims and are checked against the cached token_version."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(
+            email="ada@example.com", password="old-password", first_name="Ada", last_name="Lovelace"
+        )
+
+    def authenticate(self, access_token):
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        user, _ = CustomJWTAuthentication().authenticate(request)
+        return user
+
+    def test_claims_user_is_built_without_loading_the_row(self):
+        access = self.user.create_tokens()["access"]
+
+        # The first request caches the (token_version, is_active) state
+        self.authenticate(access)
+        with self.assertNumQueries(0):
+            user = self.authenticate(access)
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, "ada@example.com")
+        self.assertTrue(user.is_token_principal)
+
+    def test_claims_user_cannot_be_saved_or_deleted(self):
+        user = self.authenticate(self.user.create_tokens()["access"])
+
+        with self.assertRaises(TypeError):
+            user.save()
+        with self.assertRaises(TypeError):
+            user.delete()
+        self.assertTrue(User.objects.filter(pk=self.user.pk, password=self.user.password).exists())
+
+    def test_password_change_revokes_earlier_tokens(self):
+        old_tokens = self.user.create_tokens()
+        request = self.factory.post("/")
+        request.user = self.authenticate(old_tokens["access"])
+
+        serializer = ChangePasswordSerializer(
+            data={"old_password": "old-password", "new_password": "new-password"},
+            context={"request": request},
+        )
+        self.assertTrue(serializer.is_valid())
+
+        with self.assertRaisesMessage(AuthenticationFailed, "revoked"):
+            self.authenticate(old_tokens["access"])
+        with self.assertRaisesMessage(ValueError, "revoked"):
+            JWTManager.refresh_access_token(old_tokens["refresh"])
+
+        # The caller gets fresh tokens with the new version
+        self.assertEqual(self.authenticate(serializer.validated_data["tokens"]["access"]).pk, self.user.pk)
+
+    def test_password_reset_revokes_earlier_tokens(self):
+        old_tokens = self.user.create_tokens()
+        session_key = create_session({"user_id": str(self.user.id)})
+        session_token = jwt.encode({"session_key": session_key}, settings.SECRET_KEY, algorithm="HS256")
+        request = self.factory.post(f"/?session_token={session_token}")
+
+        serializer = ResetPasswordSerializer(data={"new_password": "new-password"}, context={"request": request})
+        self.assertTrue(serializer.is_valid())
+
+        with self.assertRaisesMessage(AuthenticationFailed, "revoked"):
+            self.authenticate(old_tokens["access"])
+        with self.assertRaisesMessage(ValueError, "revoked"):
+            JWTManager.refresh_access_token(old_tokens["refresh"])
+
+    def test_inactive_user_is_rejected(self):
+        tokens = self.user.create_tokens()
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaisesMessage(AuthenticationFailed, "inactive"):
+            self.authenticate(tokens["access"])
+        with self.assertRaisesMessage(ValueError, "inactive"):
+            JWTManager.refresh_access_token(tokens["refresh"])
+
+    def test_refresh_mints_claims_from_the_current_row(self):
+        refresh = self.user.create_tokens()["refresh"]
+        self.user.email = "ada.king@example.com"
+        self.user.save()
+
+        access = JWTManager.refresh_access_token(refresh)
+
+        self.assertEqual(JWTManager.verify_access_token(access)["email"], "ada.king@example.com")
+
+    def test_legacy_tokens_without_token_version_load_the_row(self):
+        legacy = {"user_id": str(self.user.id)}
+        access = JWTManager.create_access_token(legacy)
+
+        user = self.authenticate(access)
+        self.assertFalse(user.is_token_principal)
+        self.assertEqual(user.pk, self.user.pk)
+
+        # Refreshing a legacy token upgrades it to a claims token
+        new_access = JWTManager.refresh_access_token(JWTManager.create_refresh_token(legacy))
+        self.assertEqual(JWTManager.verify_access_token(new_access)["token_version"], self.user.token_version)
+
+    def test_claims_auth_disabled_loads_the_row(self):
+        access = self.user.create_tokens()["access"]
+
+        with mock.patch.object(JWTManager, "USER_CLAIMS_AUTH", False):
+            user = self.authenticate(access)
+            self.assertFalse(user.is_token_principal)
+            self.assertEqual(user.pk, self.user.pk)
+
+            self.user.is_active = False
+            self.user.save()
+            with self.assertRaisesMessage(AuthenticationFailed, "inactive"):
+                self.authenticate(access)
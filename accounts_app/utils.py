@@ -10,6 +10,7 @@ class JWTManager:
     # Load custom JWT settings
     ACCESS_LIFETIME = settings.CUSTOM_JWT.get("ACCESS_TOKEN_LIFETIME_MINUTES", 15)
     REFRESH_LIFETIME = settings.CUSTOM_JWT.get("REFRESH_TOKEN_LIFETIME_DAYS", 10)
+    USER_CLAIMS_AUTH = settings.CUSTOM_JWT.get("USER_CLAIMS_AUTH", False)
 
     # ---------------------------------------------------------
     # Internal decode
@@ -76,12 +77,17 @@ class JWTManager:
     # ---------------------------------------------------------
     @staticmethod
     def refresh_access_token(refresh_token: str) -> str:
+        from .models import User
+
         payload = JWTManager.verify_refresh_token(refresh_token)
 
-        # Remove internal fields (exp, type)
-        new_payload = {
-            key: value for key, value in payload.items()
-            if key not in ["exp", "type"]
-        }
+        # Mint from the user row so new access tokens carry the current email / name
+        user = User.objects.filter(id=payload.get("user_id"), is_active=True).first()
+        if not user:
+            raise ValueError("User not found or inactive")
+
+        # Refresh tokens issued before user claims existed carry no token_version
+        if "token_version" in payload and user.token_version != payload["token_version"]:
+            raise ValueError("Token has been revoked")
 
-        return JWTManager.create_access_token(new_payload)
\ No newline at end of file
+        return JWTManager.create_access_token(user.token_claims())
@@ -4,7 +4,6 @@ from . import models
 from rest_framework.permissions import AllowAny
 from rest_framework.throttling import ScopedRateThrottle
 from helper.utils import delete_session
-from workflows.create_debate_agents.flows import debate_agents_creation_graph
 
 
 class RegisterView(generics.CreateAPIView):
@@ -33,7 +32,10 @@ class ChangePasswordView(views.APIView):
     def post(self, request):
         serializer = self.serializer_class(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
-        return response.Response({'detail': "Password changed successfully"}, status=status.HTTP_200_OK)
+        return response.Response(
+            {'detail': "Password changed successfully", 'tokens': serializer.validated_data["tokens"]},
+            status=status.HTTP_200_OK
+        )
      
 
 class ForgotPasswordRequestView(views.APIView):
@@ -68,4 +70,5 @@ class UserSelfRetrieveUpdateView(generics.RetrieveUpdateAPIView):
     queryset = models.User.objects.all()
 
     def get_object(self):
-        return self.request.user
+        # request.user may be built from token claims, without the full row.
+        return self.get_queryset().get(pk=self.request.user.pk)
@@ -1,3 +1,4 @@
-from helper.classes import ContextStorage
+from helper.classes import ContextStorage, LLMClientRegistry
 
-context_storage = ContextStorage()
\ No newline at end of file
+context_storage = ContextStorage()
+llm_clients = LLMClientRegistry()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import json
 import os
 from pathlib import Path
 from corsheaders.defaults import default_headers
@@ -103,9 +104,97 @@ REST_FRAMEWORK = {
 CUSTOM_JWT = {
     "ACCESS_TOKEN_LIFETIME_MINUTES": 1500,   
     "REFRESH_TOKEN_LIFETIME_DAYS": 30,     
+    # Authenticate from the user claims in access tokens (checked against a cached
+    # token version) instead of loading the user row on every request.
+    "USER_CLAIMS_AUTH": os.environ.get('JWT_USER_CLAIMS_AUTH', 'True') == 'True',
 }
 
 
+# Debate workflow
+# Max number of agents asked for their speak intent at the same time (1 = sequential).
+DEBATE_SPEAK_INTENT_CONCURRENCY = int(os.environ.get('DEBATE_SPEAK_INTENT_CONCURRENCY', 5))
+# Upper bound for a per-request `speak_intent_concurrency` override.
+DEBATE_SPEAK_INTENT_MAX_CONCURRENCY = int(os.environ.get('DEBATE_SPEAK_INTENT_MAX_CONCURRENCY', 10))
+# Max number of initial agents expanded at the same time while setting up a debate.
+DEBATE_AGENT_EXPANSION_CONCURRENCY = int(os.environ.get('DEBATE_AGENT_EXPANSION_CONCURRENCY', 10))
+# Fraction of the memory budget at which older messages start being summarized in the background (>= 1 disables it).
+DEBATE_MEMORY_PRECOMPACTION_RATIO = float(os.environ.get('DEBATE_MEMORY_PRECOMPACTION_RATIO', 0.75))
+
+
+# LLM interaction logs
+# Buffered logs are written in batches by a background thread instead of on the request thread.
+LLM_LOG_BUFFERED = os.environ.get('LLM_LOG_BUFFERED', 'True') == 'True'
+LLM_LOG_QUEUE_SIZE = int(os.environ.get('LLM_LOG_QUEUE_SIZE', 10000))
+LLM_LOG_BATCH_SIZE = int(os.environ.get('LLM_LOG_BATCH_SIZE', 100))
+LLM_LOG_FLUSH_INTERVAL_SECONDS = float(os.environ.get('LLM_LOG_FLUSH_INTERVAL_SECONDS', 2))
+# What to do when the queue is full: 'drop' the record, or 'block' for up to LLM_LOG_BLOCK_TIMEOUT_SECONDS first.
+LLM_LOG_OVERFLOW_POLICY = os.environ.get('LLM_LOG_OVERFLOW_POLICY', 'drop')
+LLM_LOG_BLOCK_TIMEOUT_SECONDS = float(os.environ.get('LLM_LOG_BLOCK_TIMEOUT_SECONDS', 0.5))
+
+# Per-task model routing, merged over helper.consonants.LLM_TASK_ROUTES.
+# JSON, e.g. {"super_agent": {"provider": "groq", "model_key": "llama-3.3-70b-versatile"}}
+LLM_TASK_ROUTES = json.loads(os.environ.get('LLM_TASK_ROUTES', '{}'))
+# How long a worker trusts its cached "is this routed model active" answer.
+LLM_MODEL_AVAILABILITY_TTL_SECONDS = int(os.environ.get('LLM_MODEL_AVAILABILITY_TTL_SECONDS', 60))
+# Max LLM clients (one per provider / model / api key) each worker keeps alive.
+LLM_CLIENT_REGISTRY_MAX_CLIENTS = int(os.environ.get('LLM_CLIENT_REGISTRY_MAX_CLIENTS', 64))
+
+
+# Shared cache for all workers. Without REDIS_URL each worker gets its own LocMemCache
+# and the org/auth lookup caches below fall back to their in-process tier only.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# Organization lookup cache (X-Org-ID): shared cache TTL, the shorter in-process TTL
+# that bounds how stale another worker's copy can get, and how long unknown ids are remembered.
+ORG_CACHE_TTL_SECONDS = int(os.environ.get('ORG_CACHE_TTL_SECONDS', 300))
+ORG_CACHE_LOCAL_TTL_SECONDS = int(os.environ.get('ORG_CACHE_LOCAL_TTL_SECONDS', 30))
+ORG_CACHE_NEGATIVE_TTL_SECONDS = int(os.environ.get('ORG_CACHE_NEGATIVE_TTL_SECONDS', 30))
+ORG_CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get('ORG_CACHE_LOCAL_MAX_ENTRIES', 1024))
+# Membership/role cache per (user, org); shares the negative TTL and size above.
+ORG_MEMBER_CACHE_TTL_SECONDS = int(os.environ.get('ORG_MEMBER_CACHE_TTL_SECONDS', 300))
+# In-process TTL for permission-bearing caches: how long a removed/demoted member (or a
+# revoked token) can still pass on a worker other than the one that made the change.
+AUTH_CACHE_LOCAL_TTL_SECONDS = int(os.environ.get('AUTH_CACHE_LOCAL_TTL_SECONDS', 5))
+# Per-user (token_version, is_active) cache behind claims-based JWT auth; uses AUTH_CACHE_LOCAL_TTL_SECONDS.
+USER_AUTH_CACHE_TTL_SECONDS = int(os.environ.get('USER_AUTH_CACHE_TTL_SECONDS', 300))
+# How long unknown user ids are remembered, and how many users each worker keeps locally.
+USER_AUTH_CACHE_NEGATIVE_TTL_SECONDS = int(os.environ.get('USER_AUTH_CACHE_NEGATIVE_TTL_SECONDS', 30))
+USER_AUTH_CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get('USER_AUTH_CACHE_LOCAL_MAX_ENTRIES', 4096))
+
+
+# Server-sent event streams
+# Idle streams get a comment line this often so proxies and browsers keep them open.
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+# Consecutive agent tokens are sent as one frame per window (0 sends every token on its own).
+SSE_TOKEN_COALESCE_MS = float(os.environ.get('SSE_TOKEN_COALESCE_MS', 50))
+SSE_TOKEN_COALESCE_MAX_CHARS = int(os.environ.get('SSE_TOKEN_COALESCE_MAX_CHARS', 512))
+# How long the event log of a finished detached debate run stays available for replay.
+DEBATE_RUN_LOG_RETENTION_SECONDS = int(os.environ.get('DEBATE_RUN_LOG_RETENTION_SECONDS', 600))
+# Where detached debate runs keep their event logs. Every worker must see the same logs,
+# so with REDIS_URL they live in Redis; the in-memory store only works with a single worker.
+DEBATE_RUN_STORE = os.environ.get(
+    'DEBATE_RUN_STORE',
+    'core_app.debate_runs.RedisDebateRunStore' if REDIS_URL else 'core_app.debate_runs.InMemoryDebateRunStore'
+)
+# A run that produces no event for this long is treated as dead (its worker went away) by the Redis backends.
+DEBATE_RUN_LEASE_SECONDS = int(os.environ.get('DEBATE_RUN_LEASE_SECONDS', 300))
+# Viewers of a debate share one run through this backend. With REDIS_URL runs are owned and
+# fanned out across workers; the in-memory backend only shares a run within one process.
+DEBATE_BROADCAST_BACKEND = os.environ.get(
+    'DEBATE_BROADCAST_BACKEND',
+    'core_app.broadcast.RedisBroadcastBackend' if REDIS_URL else 'core_app.broadcast.InMemoryBroadcastBackend'
+)
+# Events buffered per viewer before a slow viewer is evicted from the run.
+DEBATE_BROADCAST_QUEUE_SIZE = int(os.environ.get('DEBATE_BROADCAST_QUEUE_SIZE', 1000))
+
+
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -1,4 +1,73 @@
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextvars import Context, copy_context
+from typing import Any, Callable, Iterable, Optional
+from django.db import close_old_connections
+from config import context_storage
 
 executor = ThreadPoolExecutor(max_workers=5)
 
+
+def _run_with_org(func: Callable, org: Any, *args) -> Any:
+    """Runs `func(*args)` on a pool thread with `org` (or the inherited one) as the current organization."""
+    try:
+        with context_storage.org_scope(org):
+            return func(*args)
+    finally:
+        close_old_connections()
+
+
+def submit(func: Callable, *args, org: Optional[Any] = None, inherit_context: bool = True) -> Future:
+    """
+    Schedules `func(*args)` on the shared executor and returns its future.
+
+    With `inherit_context` the call runs in a copy of the caller's context
+    (current organization and LangChain callbacks included); background work
+    that must not show up in the caller's graph stream should pass
+    `inherit_context=False` and gets an empty context with only `org` set.
+    """
+    if not inherit_context:
+        return executor.submit(Context().run, _run_with_org, func, org, *args)
+    return executor.submit(copy_context().run, _run_with_org, func, org, *args)
+
+
+def run_in_parallel(func: Callable, items: Iterable[Any], max_concurrency: int = 1, org: Optional[Any] = None) -> list:
+    """
+    Calls `func` for every item on the shared executor, with at most
+    `max_concurrency` calls in flight, and returns the results in input order.
+
+    Each call runs in a copy of the caller's context so LangChain callbacks
+    (and therefore LangGraph message streaming) still see the running node.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    max_concurrency = max(1, int(max_concurrency or 1))
+
+    if max_concurrency == 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    pending = {}
+    queue = iter(enumerate(items))
+
+    def submit_next():
+        next_item = next(queue, None)
+        if next_item is None:
+            return
+        index, item = next_item
+        future = submit(func, item, org=org)
+        pending[future] = index
+
+    for _ in range(max_concurrency):
+        submit_next()
+
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                results[index] = future.result()
+                submit_next()
+    finally:
+        for future in pending:
+            future.cancel()
+
+    return results
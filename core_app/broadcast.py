@@ -0,0 +1,370 @@
+import abc
+import json
+import logging
+import threading
+from collections import deque
+from typing import AsyncIterator, Iterator, Optional
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .utils import Notifier
+
+logger = logging.getLogger(__name__)
+
+
+def _control_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _parse_event(frame: str) -> tuple[Optional[str], Optional[str]]:
+    """(event name, raw data) of one SSE frame."""
+    name = data = None
+    for line in frame.splitlines():
+        if line.startswith("event: "):
+            name = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = line[len("data: "):]
+    return name, data
+
+
+class Subscription:
+    """
+    One viewer's bounded queue of events from a debate run.
+
+    The publisher never waits on a viewer: when the queue is full the backend
+    evicts the subscription, the viewer drains what it already has and then
+    gets a `run_evicted` event.
+    """
+
+    def __init__(self, channel: str, maxsize: int, run_state: Optional[dict] = None):
+        self.channel = channel
+        self.maxsize = maxsize
+        # Run state as of subscribing, consistent with the first queued event
+        self.run_state = run_state or {}
+        self.evicted = False
+        self.closed = False
+        self._events = deque()
+        self._notifier = Notifier()
+
+    def put(self, event: str) -> bool:
+        """Queues an event; returns False if the queue is full."""
+        with self._notifier.condition:
+            if self.closed:
+                return True
+            if len(self._events) >= self.maxsize:
+                return False
+            self._events.append(event)
+            self._notifier.notify()
+        return True
+
+    def close(self, evicted: bool = False):
+        with self._notifier.condition:
+            self.closed = True
+            self.evicted = evicted
+            self._notifier.notify()
+
+    def _ready(self) -> bool:
+        return bool(self._events) or self.closed
+
+    def _drain(self) -> tuple[list[str], bool]:
+        with self._notifier.condition:
+            events = list(self._events)
+            self._events.clear()
+            return events, self.closed
+
+    def _closing_events(self) -> list[str]:
+        if self.evicted:
+            return [_control_event("run_evicted", {"reason": "Viewer fell too far behind the debate run"})]
+        return []
+
+    def events(self) -> Iterator[str]:
+        while True:
+            with self._notifier.condition:
+                self._notifier.condition.wait_for(self._ready)
+            events, closed = self._drain()
+
+            yield from events
+            if closed:
+                yield from self._closing_events()
+                return
+
+    async def aevents(self) -> AsyncIterator[str]:
+        while True:
+            await self._notifier.wait_async(self._ready)
+            events, closed = self._drain()
+
+            for event in events:
+                yield event
+            if closed:
+                for event in self._closing_events():
+                    yield event
+                return
+
+
+class BroadcastBackend(abc.ABC):
+    """
+    Ownership and fan-out for debate runs, keyed by channel (the debate id).
+
+    `acquire` must be atomic across everything sharing the backend, so exactly
+    one runner owns a run. `publish` may replace the channel's run state (e.g.
+    the agent currently speaking); `subscribe` hands a new viewer the state
+    that matches the first event it will receive. Selected with
+    `DEBATE_BROADCAST_BACKEND`.
+    """
+
+    @abc.abstractmethod
+    def acquire(self, channel: str) -> bool:
+        """Takes ownership of the channel; False if someone already owns it."""
+
+    @abc.abstractmethod
+    def release(self, channel: str):
+        """Gives up ownership and closes every subscription to the channel."""
+
+    @abc.abstractmethod
+    def publish(self, channel: str, event: str, run_state: Optional[dict] = None):
+        """Queues `event` for every subscription; full queues are evicted."""
+
+    @abc.abstractmethod
+    def subscribe(self, channel: str, maxsize: int) -> Optional[Subscription]:
+        """Returns a subscription to the active run, or None if there is none."""
+
+    @abc.abstractmethod
+    def unsubscribe(self, subscription: Subscription):
+        """Stops delivering events to `subscription`."""
+
+
+class InMemoryBroadcastBackend(BroadcastBackend):
+    """Process-local backend: viewers share a run only within the same worker."""
+
+    def __init__(self):
+        self._channels: dict[str, set[Subscription]] = {}
+        self._run_states: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.evicted_count = 0
+
+    def acquire(self, channel: str) -> bool:
+        with self._lock:
+            if channel in self._channels:
+                return False
+            self._channels[channel] = set()
+            self._run_states[channel] = {}
+            return True
+
+    def release(self, channel: str):
+        with self._lock:
+            subscriptions = self._channels.pop(channel, set())
+            self._run_states.pop(channel, None)
+        for subscription in subscriptions:
+            subscription.close()
+
+    def publish(self, channel: str, event: str, run_state: Optional[dict] = None):
+        with self._lock:
+            if run_state is not None and channel in self._run_states:
+                self._run_states[channel] = run_state
+            subscriptions = list(self._channels.get(channel, ()))
+
+        for subscription in subscriptions:
+            if not subscription.put(event):
+                self._evict(subscription)
+
+    def subscribe(self, channel: str, maxsize: int) -> Optional[Subscription]:
+        with self._lock:
+            subscriptions = self._channels.get(channel)
+            if subscriptions is None:
+                return None
+            subscription = Subscription(channel, maxsize, dict(self._run_states.get(channel, {})))
+            subscriptions.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._channels.get(subscription.channel, set()).discard(subscription)
+
+    def _evict(self, subscription: Subscription):
+        self.unsubscribe(subscription)
+        subscription.close(evicted=True)
+        self.evicted_count += 1
+        logger.warning(
+            "Evicted a slow viewer from debate run %s (total evicted: %s)",
+            subscription.channel, self.evicted_count
+        )
+
+
+class RedisBroadcastBackend(InMemoryBroadcastBackend):
+    """
+    Backend shared by every worker through `REDIS_URL`.
+
+    Ownership is a Redis key taken with `SET NX` on a lease of
+    `DEBATE_RUN_LEASE_SECONDS` that every publish renews, so a run whose worker
+    died is released by expiry. Events go out over Redis pub/sub; each worker
+    listens on one connection and fans them out to its own subscriptions,
+    with the same bounded queues and eviction as the in-memory backend.
+    """
+
+    def __init__(self):
+        import redis
+
+        super().__init__()
+        self._redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._listener = None
+
+    def _keys(self, channel: str) -> tuple[str, str, str]:
+        prefix = f"debate_broadcast:{channel}"
+        return f"{prefix}:owner", f"{prefix}:state", f"{prefix}:events"
+
+    def acquire(self, channel: str) -> bool:
+        owner_key, _, _ = self._keys(channel)
+        return bool(self._redis.set(owner_key, "1", nx=True, ex=settings.DEBATE_RUN_LEASE_SECONDS))
+
+    def release(self, channel: str):
+        owner_key, state_key, events_key = self._keys(channel)
+        pipe = self._redis.pipeline()
+        pipe.delete(owner_key, state_key)
+        # Tells every worker to close its subscriptions to the run
+        pipe.publish(events_key, json.dumps({"closed": True}))
+        pipe.execute()
+
+    def publish(self, channel: str, event: str, run_state: Optional[dict] = None):
+        owner_key, state_key, events_key = self._keys(channel)
+        lease = settings.DEBATE_RUN_LEASE_SECONDS
+        pipe = self._redis.pipeline()
+        pipe.expire(owner_key, lease)
+        if run_state is not None:
+            pipe.set(state_key, json.dumps(run_state), ex=lease)
+        pipe.publish(events_key, json.dumps({"event": event}))
+        pipe.execute()
+
+    def subscribe(self, channel: str, maxsize: int) -> Optional[Subscription]:
+        owner_key, state_key, events_key = self._keys(channel)
+        if not self._redis.exists(owner_key):
+            return None
+
+        subscription = Subscription(channel, maxsize)
+        with self._lock:
+            subscriptions = self._channels.setdefault(channel, set())
+            if not subscriptions:
+                self._pubsub.subscribe(**{events_key: self._dispatch})
+            subscriptions.add(subscription)
+            if self._listener is None:
+                self._listener = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+        # Checked after subscribing: a run that ended in between would never send its close
+        run_state = self._redis.get(state_key)
+        if not self._redis.exists(owner_key):
+            self.unsubscribe(subscription)
+            return None
+        subscription.run_state = json.loads(run_state) if run_state else {}
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        _, _, events_key = self._keys(subscription.channel)
+        with self._lock:
+            subscriptions = self._channels.get(subscription.channel)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._channels[subscription.channel]
+                self._pubsub.unsubscribe(events_key)
+
+    def _dispatch(self, message: dict):
+        """Runs on the listener thread for every message on a subscribed run."""
+        channel = message["channel"].split(":")[1]
+        payload = json.loads(message["data"])
+
+        with self._lock:
+            subscriptions = list(self._channels.get(channel, ()))
+
+        for subscription in subscriptions:
+            if payload.get("closed"):
+                self.unsubscribe(subscription)
+                subscription.close()
+            elif not subscription.put(payload["event"]):
+                self._evict(subscription)
+
+
+class DebateBroadcastHub:
+    """
+    Lets every viewer of a debate share a single run.
+
+    The run itself executes detached from any request (see `debate_runs`):
+    its runner owns the debate's channel (`try_acquire`), `publish`es each
+    event and `finish`es the run. Viewers only subscribe, so no viewer's
+    disconnect affects the run or the other viewers.
+
+    Viewers get `run_joined` (with the agent currently speaking, if any) when
+    they attach, and `run_ended` or `run_aborted` before their stream closes.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> BroadcastBackend:
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = import_string(settings.DEBATE_BROADCAST_BACKEND)()
+        return self._backend
+
+    def try_acquire(self, debate_id) -> bool:
+        """Takes ownership of the debate's run; the owner must `finish` it."""
+        return self.backend.acquire(str(debate_id))
+
+    def release(self, debate_id):
+        self.backend.release(str(debate_id))
+
+    def _joined_event(self, subscription: Subscription) -> str:
+        return _control_event("run_joined", {
+            "debate_id": subscription.channel,
+            "current_agent": subscription.run_state.get("current_agent"),
+        })
+
+    def _ended_event(self, channel: str, completed: bool) -> str:
+        if completed:
+            return _control_event("run_ended", {"debate_id": channel})
+        return _control_event("run_aborted", {
+            "debate_id": channel,
+            "reason": "The debate run stopped before finishing",
+        })
+
+    def _run_state_for(self, event: str) -> Optional[dict]:
+        """New run state if `event` changes it, else None."""
+        name, data = _parse_event(event)
+        if name == "agent_response_start":
+            return {"current_agent": json.loads(data) if data else {}}
+        if name == "agent_response_end":
+            return {"current_agent": None}
+        return None
+
+    def publish(self, debate_id, event: str):
+        self.backend.publish(str(debate_id), event, self._run_state_for(event))
+
+    def finish(self, debate_id, completed: bool):
+        """Tells the viewers how the run ended and releases its channel."""
+        channel = str(debate_id)
+        self.backend.publish(channel, self._ended_event(channel, completed))
+        self.backend.release(channel)
+
+    def subscribe(self, debate_id) -> Optional[Subscription]:
+        """Subscribes to the debate's run in progress, or returns None if there is none."""
+        return self.backend.subscribe(str(debate_id), settings.DEBATE_BROADCAST_QUEUE_SIZE)
+
+    def stream(self, subscription: Subscription) -> Iterator[str]:
+        try:
+            yield self._joined_event(subscription)
+            yield from subscription.events()
+        finally:
+            self.backend.unsubscribe(subscription)
+
+    async def astream(self, subscription: Subscription) -> AsyncIterator[str]:
+        try:
+            yield self._joined_event(subscription)
+            async for event in subscription.aevents():
+                yield event
+        finally:
+            self.backend.unsubscribe(subscription)
+
+
+broadcast_hub = DebateBroadcastHub()
@@ -0,0 +1,320 @@
+import abc
+import threading
+import time
+from typing import AsyncIterator, Iterator, Optional
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+from config import context_storage
+from .broadcast import broadcast_hub, Subscription
+from .utils import Notifier
+
+
+def format_logged_event(event_id: int, event: str) -> str:
+    return f"id: {event_id}\n{event}"
+
+
+class DebateRunStore(abc.ABC):
+    """
+    Append-only event logs of detached debate runs, keyed by debate id.
+
+    Event ids are 1-based positions in a run's log, so a client that saw event
+    `n` resumes with `Last-Event-ID: n` and receives everything after it. The
+    store must be shared by every worker serving the API, so a client can
+    attach to a run from whichever worker its request lands on; it is
+    selected with `DEBATE_RUN_STORE`. Finished logs are kept for
+    `DEBATE_RUN_LOG_RETENTION_SECONDS` for late replays.
+    """
+
+    # Longest a single `read` blocks; readers loop, so this only bounds how
+    # quickly a vanished run is noticed
+    READ_TIMEOUT_SECONDS = 5.0
+
+    @abc.abstractmethod
+    def open(self, run_id: str):
+        """Starts an empty log for a new run, replacing the debate's previous one."""
+
+    @abc.abstractmethod
+    def append(self, run_id: str, event: str) -> int:
+        """Adds an event to the run's log and returns its id."""
+
+    @abc.abstractmethod
+    def close(self, run_id: str):
+        """Marks the run finished; readers get the remaining events and stop."""
+
+    @abc.abstractmethod
+    def exists(self, run_id: str) -> bool:
+        """True while the run is going and during the retention after it."""
+
+    @abc.abstractmethod
+    def read(self, run_id: str, offset: int, timeout: float) -> tuple[list[str], bool]:
+        """
+        Events after `offset` and whether the run has finished (or is gone),
+        waiting up to `timeout` seconds when there are none yet.
+        """
+
+    @abc.abstractmethod
+    async def aread(self, run_id: str, offset: int, timeout: float) -> tuple[list[str], bool]:
+        """Async counterpart of `read`; waiting does not hold a thread."""
+
+    def follow(self, run_id: str, offset: int = 0) -> Iterator[str]:
+        """Yields events after `offset`, blocking for new ones until the run ends."""
+        while True:
+            events, finished = self.read(run_id, offset, self.READ_TIMEOUT_SECONDS)
+            for event in events:
+                offset += 1
+                yield format_logged_event(offset, event)
+
+            if finished and not events:
+                return
+
+    async def afollow(self, run_id: str, offset: int = 0) -> AsyncIterator[str]:
+        """Async counterpart of `follow`."""
+        while True:
+            events, finished = await self.aread(run_id, offset, self.READ_TIMEOUT_SECONDS)
+            for event in events:
+                offset += 1
+                yield format_logged_event(offset, event)
+
+            if finished and not events:
+                return
+
+
+class _InMemoryEventLog:
+    def __init__(self):
+        self.events: list[str] = []
+        self.finished = False
+        self.finished_at: Optional[float] = None
+        self.notifier = Notifier()
+
+
+class InMemoryDebateRunStore(DebateRunStore):
+    """Process-local store: clients can only attach on the worker running the debate."""
+
+    def __init__(self):
+        self._logs: dict[str, _InMemoryEventLog] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, run_id: str) -> Optional[_InMemoryEventLog]:
+        with self._lock:
+            self._evict_expired()
+            return self._logs.get(run_id)
+
+    def open(self, run_id: str):
+        with self._lock:
+            self._evict_expired()
+            self._logs[run_id] = _InMemoryEventLog()
+
+    def append(self, run_id: str, event: str) -> int:
+        log = self._get(run_id)
+        with log.notifier.condition:
+            log.events.append(event)
+            log.notifier.notify()
+            return len(log.events)
+
+    def close(self, run_id: str):
+        log = self._get(run_id)
+        if log is None:
+            return
+        with log.notifier.condition:
+            log.finished = True
+            log.finished_at = time.monotonic()
+            log.notifier.notify()
+
+    def exists(self, run_id: str) -> bool:
+        return self._get(run_id) is not None
+
+    def read(self, run_id: str, offset: int, timeout: float) -> tuple[list[str], bool]:
+        log = self._get(run_id)
+        if log is None:
+            return [], True
+
+        with log.notifier.condition:
+            log.notifier.condition.wait_for(lambda: len(log.events) > offset or log.finished, timeout)
+            return log.events[offset:], log.finished
+
+    async def aread(self, run_id: str, offset: int, timeout: float) -> tuple[list[str], bool]:
+        log = self._get(run_id)
+        if log is None:
+            return [], True
+
+        await log.notifier.wait_async(lambda: len(log.events) > offset or log.finished, timeout)
+        with log.notifier.condition:
+            return log.events[offset:], log.finished
+
+    def _evict_expired(self):
+        # Called with the lock held
+        cutoff = time.monotonic() - settings.DEBATE_RUN_LOG_RETENTION_SECONDS
+        expired = [
+            run_id for run_id, log in self._logs.items()
+            if log.finished and log.finished_at < cutoff
+        ]
+        for run_id in expired:
+            del self._logs[run_id]
+
+
+class RedisDebateRunStore(DebateRunStore):
+    """
+    Store shared by every worker through `REDIS_URL`.
+
+    A run's log is a Redis stream whose entry ids are `0-<event id>`, next to a
+    status key. While the run goes, every append renews both for
+    `DEBATE_RUN_LEASE_SECONDS`, so the log of a run whose worker died expires
+    instead of keeping readers waiting; closing switches them to the retention.
+    """
+
+    def __init__(self):
+        import redis
+        import redis.asyncio
+
+        self._redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        self._async_redis = redis.asyncio.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+    def _keys(self, run_id: str) -> tuple[str, str, str]:
+        prefix = f"debate_run:{run_id}"
+        return f"{prefix}:status", f"{prefix}:events", f"{prefix}:seq"
+
+    def open(self, run_id: str):
+        status_key, events_key, seq_key = self._keys(run_id)
+        pipe = self._redis.pipeline()
+        pipe.delete(events_key, seq_key)
+        pipe.set(status_key, "running", ex=settings.DEBATE_RUN_LEASE_SECONDS)
+        pipe.execute()
+
+    def append(self, run_id: str, event: str) -> int:
+        # Only the run's owner appends, so the sequence and the stream stay in step
+        status_key, events_key, seq_key = self._keys(run_id)
+        event_id = self._redis.incr(seq_key)
+
+        lease = settings.DEBATE_RUN_LEASE_SECONDS
+        pipe = self._redis.pipeline()
+        pipe.xadd(events_key, {"event": event}, id=f"0-{event_id}")
+        for key in (status_key, events_key, seq_key):
+            pipe.expire(key, lease)
+        pipe.execute()
+        return event_id
+
+    def close(self, run_id: str):
+        retention = settings.DEBATE_RUN_LOG_RETENTION_SECONDS
+        status_key, events_key, seq_key = self._keys(run_id)
+        pipe = self._redis.pipeline()
+        pipe.set(status_key, "finished", ex=retention)
+        pipe.expire(events_key, retention)
+        pipe.delete(seq_key)
+        pipe.execute()
+
+    def exists(self, run_id: str) -> bool:
+        status_key, _, _ = self._keys(run_id)
+        return bool(self._redis.exists(status_key))
+
+    def _result(self, response, status: Optional[str]) -> tuple[list[str], bool]:
+        events = [fields["event"] for _, entries in response or [] for _, fields in entries]
+        return events, status != "running"
+
+    def read(self, run_id: str, offset: int, timeout: float) -> tuple[list[str], bool]:
+        status_key, events_key, _ = self._keys(run_id)
+        # Status first: once it says finished, every event is already in the stream
+        status = self._redis.get(status_key)
+        block = None if status != "running" else int(timeout * 1000)
+        response = self._redis.xread({events_key: f"0-{offset}"}, block=block)
+        return self._result(response, status)
+
+    async def aread(self, run_id: str, offset: int, timeout: float) -> tuple[list[str], bool]:
+        status_key, events_key, _ = self._keys(run_id)
+        status = await self._async_redis.get(status_key)
+        block = None if status != "running" else int(timeout * 1000)
+        response = await self._async_redis.xread({events_key: f"0-{offset}"}, block=block)
+        return self._result(response, status)
+
+
+class DebateRunRegistry:
+    """
+    Runs debates detached from the requests that watch them.
+
+    Each run executes `processor.process()` on its own daemon thread. Every
+    event is published through the broadcast hub, for live viewers, and
+    appended to the debate's log in the run store, for clients that attach,
+    disconnect and resume later. No viewer owns the run, so none of them
+    can stop it by going away.
+    """
+
+    def __init__(self):
+        self._store = None
+        self._lock = threading.Lock()
+
+    @property
+    def store(self) -> DebateRunStore:
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = import_string(settings.DEBATE_RUN_STORE)()
+        return self._store
+
+    def exists(self, debate_id) -> bool:
+        return self.store.exists(str(debate_id))
+
+    def follow(self, debate_id, offset: int = 0) -> Iterator[str]:
+        return self.store.follow(str(debate_id), offset)
+
+    def afollow(self, debate_id, offset: int = 0) -> AsyncIterator[str]:
+        return self.store.afollow(str(debate_id), offset)
+
+    def start(self, debate_id, processor) -> bool:
+        """Starts a detached run of the debate; False if one is already running."""
+        if not broadcast_hub.try_acquire(debate_id):
+            return False
+        self._launch(str(debate_id), processor)
+        return True
+
+    def subscribe(self, debate_id, processor) -> Subscription:
+        """Subscribes to the debate's run, starting it first if none is running."""
+        while True:
+            if broadcast_hub.try_acquire(debate_id):
+                # Subscribed before the runner starts, so no event is missed
+                subscription = broadcast_hub.subscribe(debate_id)
+                self._launch(str(debate_id), processor)
+                return subscription
+
+            subscription = broadcast_hub.subscribe(debate_id)
+            if subscription is not None:
+                return subscription
+            # The run ended in between; try to own the next one
+
+    def _launch(self, run_id: str, processor):
+        """Starts the runner of a run whose channel was just acquired."""
+        try:
+            self.store.open(run_id)
+            thread = threading.Thread(
+                target=self._run,
+                args=(run_id, processor, context_storage.get_current_org()),
+                name=f"debate-run-{run_id}",
+                daemon=True,
+            )
+            thread.start()
+        except Exception:
+            self.store.close(run_id)
+            broadcast_hub.release(run_id)
+            raise
+
+    def _emit(self, run_id: str, event: str):
+        self.store.append(run_id, event)
+        broadcast_hub.publish(run_id, event)
+
+    def _run(self, run_id: str, processor, org):
+        """Runs on the thread the channel ownership was handed to, and finishes the run."""
+        completed = False
+        try:
+            with context_storage.org_scope(org):
+                for event in processor.process():
+                    self._emit(run_id, event)
+            completed = True
+        except Exception as e:
+            print(f"Error in detached debate run {run_id}: {e}")
+            self._emit(run_id, processor._send_event("error", {"message": str(e)}))
+        finally:
+            self.store.close(run_id)
+            broadcast_hub.finish(run_id, completed)
+            close_old_connections()
+
+
+debate_runs = DebateRunRegistry()
@@ -0,0 +1,128 @@
+import atexit
+import queue
+import threading
+import time
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+
+
+class LLMLogWriter:
+    """
+    Write-behind sink for `LLMModelLog` rows.
+
+    Log records are queued on the request thread and written by a background
+    thread with `bulk_create`, whenever `LLM_LOG_BATCH_SIZE` records are waiting
+    or `LLM_LOG_FLUSH_INTERVAL_SECONDS` have passed. The queue is bounded; when
+    it is full, records are dropped (`drop`) or the caller waits up to
+    `LLM_LOG_BLOCK_TIMEOUT_SECONDS` before dropping (`block`). Whatever is left
+    is flushed when the process exits.
+    """
+
+    _STOP = object()
+
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.dropped_count = 0
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, "LLM_LOG_BUFFERED", False)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._queue is None:
+                self._queue = queue.Queue(maxsize=settings.LLM_LOG_QUEUE_SIZE)
+                atexit.register(self.stop)
+            self._thread = threading.Thread(target=self._run, name="llm-log-writer", daemon=True)
+            self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def enqueue(self, record: dict) -> bool:
+        """Queues one `LLMModelLog` field dict. Returns False if it was dropped."""
+        self._ensure_started()
+
+        try:
+            if settings.LLM_LOG_OVERFLOW_POLICY == "block":
+                self._queue.put(record, timeout=settings.LLM_LOG_BLOCK_TIMEOUT_SECONDS)
+            else:
+                self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped_count += 1
+            print(f"LLM log queue is full, dropped a log record (total dropped: {self.dropped_count})")
+            return False
+
+    # ------------------------------------------------------------------
+    # Writer side
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + settings.LLM_LOG_FLUSH_INTERVAL_SECONDS
+
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+
+            if record is self._STOP:
+                self._flush(batch)
+                return
+
+            if record is not None:
+                batch.append(record)
+
+            if len(batch) >= settings.LLM_LOG_BATCH_SIZE or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + settings.LLM_LOG_FLUSH_INTERVAL_SECONDS
+
+    def _flush(self, batch: list):
+        if not batch:
+            return
+
+        from core_app.models import LLMModelLog
+
+        logs = [LLMModelLog(**record) for record in batch]
+        try:
+            with transaction.atomic():
+                LLMModelLog.all_objects.bulk_create(logs)
+        except IntegrityError:
+            # One bad row (e.g. a debate deleted meanwhile) must not lose the whole batch
+            for log in logs:
+                try:
+                    with transaction.atomic():
+                        LLMModelLog.all_objects.bulk_create([log])
+                except Exception as e:
+                    print(f"Error writing LLM log: {e}")
+        except Exception as e:
+            print(f"Error writing {len(logs)} LLM logs: {e}")
+        finally:
+            close_old_connections()
+
+    def stop(self, timeout: float = 10.0):
+        """Flushes whatever is queued and stops the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+
+        try:
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            print("LLM log queue is full at shutdown, some records may be lost")
+            return
+        self._thread.join(timeout=timeout)
+
+
+llm_log_writer = LLMLogWriter()
@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+
+from core_app.utils import AgentResponseStreamingParser
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark AgentResponseStreamingParser on long token streams"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tokens", type=int, default=5000, help="Tokens per simulated response.")
+        parser.add_argument("--runs", type=int, default=20, help="Responses to parse.")
+
+    def build_tokens(self, count: int) -> list[str]:
+        tokens = ["AGE", "NT: Risk", " Analyst\nEMO", "TION: calm\nRESP", "ONSE:"]
+        words = ["The", " margin", " case", " is", " ENDING", " weak", ",", "\n", "but", " the", " upside", " holds", "."]
+        tokens.extend(words[i % len(words)] for i in range(count))
+        tokens.extend(["\nEN", "D\n"])
+        return tokens
+
+    def handle(self, *args, **options):
+        tokens = self.build_tokens(options["tokens"])
+        runs = options["runs"]
+
+        started = time.perf_counter()
+        for _ in range(runs):
+            parser = AgentResponseStreamingParser()
+            event_count = 0
+            for token in tokens:
+                event_count += len(parser.process_token(token))
+            event_count += len(parser.finish())
+        elapsed = time.perf_counter() - started
+
+        per_token_us = elapsed / (runs * len(tokens)) * 1_000_000
+        self.stdout.write(f"📊 {runs} runs × {len(tokens)} tokens → {event_count} events per run")
+        self.stdout.write(self.style.SUCCESS(f"✅ {elapsed:.3f}s total, {per_token_us:.2f}µs per token"))
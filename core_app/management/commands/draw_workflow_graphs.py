@@ -0,0 +1,46 @@
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from workflows.debate.flows import get_debate_graph
+from workflows.create_debate_agents.flows import get_debate_agents_creation_graph
+
+
+class Command(BaseCommand):
+    help = "Render the LangGraph workflow diagrams (PNG via mermaid.ink, or offline Mermaid source)"
+
+    GRAPHS = {
+        "Debate Workflow": get_debate_graph,
+        "Debate Agents Creation Workflow": get_debate_agents_creation_graph,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output-dir",
+            default=str(settings.BASE_DIR),
+            help="Directory the diagrams are written to (default: project root).",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["png", "mermaid"],
+            default="png",
+            help="'png' renders remotely; 'mermaid' writes the .mmd source and works offline.",
+        )
+
+    def handle(self, *args, **options):
+        output_dir = Path(options["output_dir"])
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        for name, get_graph in self.GRAPHS.items():
+            graph = get_graph().get_graph(xray=True)
+
+            if options["format"] == "png":
+                image_file = output_dir / f"{name}.png"
+                image_file.write_bytes(graph.draw_mermaid_png())
+            else:
+                image_file = output_dir / f"{name}.mmd"
+                image_file.write_text(graph.draw_mermaid())
+
+            self.stdout.write(f"🖼️ {name} → {image_file}")
+
+        self.stdout.write(self.style.SUCCESS("✅ Workflow diagrams generated"))
@@ -0,0 +1,38 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, FloatField, Max
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from core_app.models import LLMModelLog
+
+
+class Command(BaseCommand):
+    help = "Summarize LLM call latency per task class and model, to tune LLM_TASK_ROUTES"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="Only include calls from the last N days.")
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options["days"])
+
+        rows = (
+            LLMModelLog.all_objects
+            .filter(timestamp__gte=since, metadata__has_key="latency_ms")
+            .annotate(
+                task=KeyTextTransform("task", "metadata"),
+                latency_ms=Cast(KeyTextTransform("latency_ms", "metadata"), FloatField()),
+            )
+            .values("task", "model_name")
+            .annotate(calls=Count("id"), avg_ms=Avg("latency_ms"), max_ms=Max("latency_ms"))
+            .order_by("task", "avg_ms")
+        )
+
+        self.stdout.write(f"📊 LLM latency per task (last {options['days']} days)")
+        for row in rows:
+            self.stdout.write(
+                f"{row['task']:<16} {row['model_name']:<40} "
+                f"{row['calls']:>6} calls  avg {row['avg_ms']:>8.1f}ms  max {row['max_ms']:>8.1f}ms"
+            )
+        self.stdout.write(self.style.SUCCESS("✅ Done"))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:13
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_next_message_order(apps, schema_editor):
+    Debate = apps.get_model('core_app', 'Debate')
+    DebateMessage = apps.get_model('core_app', 'DebateMessage')
+
+    last_order = (
+        DebateMessage.objects
+        .filter(debate=OuterRef('pk'))
+        .values('debate')
+        .annotate(last_order=Max('order'))
+        .values('last_order')
+    )
+    Debate.objects.update(
+        next_message_order=Coalesce(Subquery(last_order), Value(0)) + 1
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='debate',
+            name='next_message_order',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(backfill_next_message_order, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:22
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY does not lock writes but cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('core_app', '0002_debate_next_message_order'),
+        ('orgs_app', '0002_llmprovider_organizationllmconfig_llmmodel'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='agent',
+            index=models.Index(fields=['org', 'created_at'], name='agent_org_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='debate',
+            index=models.Index(fields=['org', '-created_at'], name='debate_org_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='debatemessage',
+            index=models.Index(fields=['org', 'order'], name='debmsg_org_order_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='debatemessage',
+            index=models.Index(condition=models.Q(('is_memory_disabled', False)), fields=['debate', 'order'], name='debmsg_memory_order_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='llmmodellog',
+            index=models.Index(fields=['org', '-timestamp'], name='llmlog_org_ts_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='llmmodellog',
+            index=models.Index(fields=['debate', '-timestamp'], name='llmlog_debate_ts_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(fields=['org', '-created_at'], name='project_org_created_idx'),
+        ),
+    ]
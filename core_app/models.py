@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import connection, models
 from orgs_app.models import OrganizationFieldMixin
 from helper.models import UUIDPrimaryKey, TimeLine, IsActiveModel
 
@@ -8,6 +8,10 @@ class Project(UUIDPrimaryKey, TimeLine, IsActiveModel, OrganizationFieldMixin):
 
     class Meta:
         ordering = ["-created_at"]
+        # Org-scoped listing (OrganizationScopedManager + default ordering)
+        indexes = [
+            models.Index(fields=["org", "-created_at"], name="project_org_created_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -29,6 +33,9 @@ class Agent(UUIDPrimaryKey, TimeLine, IsActiveModel, OrganizationFieldMixin):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["org", "created_at"], name="agent_org_created_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -44,12 +51,48 @@ class Debate(UUIDPrimaryKey, TimeLine, IsActiveModel, OrganizationFieldMixin):
 
     agents = models.ManyToManyField(Agent, related_name="debates", null=True, blank=True)
 
+    # Next DebateMessage.order to hand out; only `allocate_message_orders` may
+    # change it. Save existing debates with `update_fields` (leaving this field
+    # out) so an instance loaded before messages were added cannot rewind it.
+    next_message_order = models.PositiveIntegerField(default=1)
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["org", "-created_at"], name="debate_org_created_idx"),
+        ]
 
     def __str__(self):
         return f"Debate on {self.topic[:50]}..."
 
+    @classmethod
+    def allocate_message_orders(cls, debate_id, count: int = 1) -> int:
+        """
+        Reserves `count` consecutive message orders for a debate and returns the
+        first one. A single `UPDATE ... RETURNING`, so concurrent writers never
+        get the same order.
+        """
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {quote(cls._meta.db_table)} "
+                f"SET {quote('next_message_order')} = {quote('next_message_order')} + %s "
+                f"WHERE {quote(cls._meta.pk.column)} = %s "
+                f"RETURNING {quote('next_message_order')}",
+                [count, cls._meta.pk.get_db_prep_value(debate_id, connection)]
+            )
+            row = cursor.fetchone()
+
+        if row is None:
+            raise Debate.DoesNotExist(f"Debate {debate_id} does not exist")
+        return row[0] - count
+
+    @staticmethod
+    def _sync_message_counter(message: "DebateMessage"):
+        # Keep an already-loaded debate in step with the counter in the database
+        if DebateMessage.debate.is_cached(message):
+            message.debate.next_message_order = message.order + 1
+
     def agents_list(self):
         return "\n".join([f"- Name: {agent.name} Role: {agent.role} Goal: {agent.goal}" for agent in self.agents.all()])
     
@@ -72,22 +115,39 @@ class DebateMessage(UUIDPrimaryKey, TimeLine, OrganizationFieldMixin):
     class Meta:
         ordering = ["order"]
         unique_together = ("debate", "order")
+        indexes = [
+            models.Index(fields=["org", "order"], name="debmsg_org_order_idx"),
+            # Debate memory reads (Debate.debate_messages) only touch enabled messages
+            models.Index(
+                fields=["debate", "order"],
+                name="debmsg_memory_order_idx",
+                condition=models.Q(is_memory_disabled=False),
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if self.order is None:
-            last_message = (
-                DebateMessage.objects
-                .filter(debate=self.debate)
-                .order_by("-order")
-                .first()
-            )
-            if last_message:
-                self.order = last_message.order + 1
-            else:
-                self.order = 1
+            self.order = Debate.allocate_message_orders(self.debate_id)
+            Debate._sync_message_counter(self)
 
         super().save(*args, **kwargs)
 
+    @classmethod
+    def assign_orders(cls, messages: list["DebateMessage"]) -> list["DebateMessage"]:
+        """Fills in `order` for unsaved messages (e.g. before `bulk_create`), one allocation per debate."""
+        pending = {}
+        for message in messages:
+            if message.order is None:
+                pending.setdefault(message.debate_id, []).append(message)
+
+        for debate_id, debate_messages in pending.items():
+            first_order = Debate.allocate_message_orders(debate_id, len(debate_messages))
+            for offset, message in enumerate(debate_messages):
+                message.order = first_order + offset
+            Debate._sync_message_counter(debate_messages[-1])
+
+        return messages
+
     def __str__(self):
         return f"{self.agent.name} → {self.debate.id} (#{self.order})"
     
@@ -103,3 +163,9 @@ class LLMModelLog(UUIDPrimaryKey, OrganizationFieldMixin):
     output_response = models.TextField()
     status = models.CharField(max_length=50)
     metadata = models.JSONField(default=dict) # token_usage, response_time, etc.
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["org", "-timestamp"], name="llmlog_org_ts_idx"),
+            models.Index(fields=["debate", "-timestamp"], name="llmlog_debate_ts_idx"),
+        ]
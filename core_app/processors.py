@@ -1,13 +1,16 @@
-import json
-from typing import List, Dict
+from typing import List, Dict, Optional
+from django.conf import settings
 from django.db import transaction
 from . import serializers, models
-from helper.classes import LLMModel
 from langchain_core.messages import AIMessage
-from workflows.create_debate_agents.flows import debate_agents_creation_graph
-from workflows.debate.flows import debate_graph
-from .utils import parse_agents, AgentResponseStreamingParser
-from config import context_storage
+from helper.utils import run_sync
+from workflows.create_debate_agents.flows import get_debate_agents_creation_graph
+from workflows.debate.flows import get_debate_graph
+from workflows.debate.memory import DebateMemoryBuffer
+from workflows.debate.roster import DebateRoster
+from workflows.debate.prompt_builder import AgentPromptBuilder
+from .utils import parse_agents, AgentResponseStreamingParser, SSEEventEncoder
+from config import context_storage, llm_clients
 
 class DebateCreateProcessor:
     """
@@ -29,21 +32,22 @@ class DebateCreateProcessor:
     def __init__(self, request, project_id: str):
         self.request = request
         self.project_id = project_id
+        self.org = context_storage.get_current_org()
+        self.encoder = SSEEventEncoder()
 
 
     def _send_event(self, event: str, data: dict):
         """
         Utility to send server-sent events (SSE) data format.
+        Only str/int/list/dict values are sent; unchanged values reuse their JSON.
         """
-        # take only str and int from data
-        filtered_data = {k: v for k, v in data.items() if isinstance(v, (str, int, list, dict))}
-        return f"event: {event}\ndata: {json.dumps(filtered_data)}\n\n"
+        return self.encoder.encode_state(event, data)
 
-    def _invoke_llm(self, prompt: str) -> str:
+    def _invoke_llm(self, prompt: str, task: str = None) -> str:
         """
-        Centralized LLM call for generating responses.
+        Centralized LLM call for generating responses, on the model routed for `task`.
         """
-        llm = LLMModel(project_id=self.project_id, debate_id=None, agent_id=None)
+        llm = llm_clients.for_task(task, org=self.org, project_id=self.project_id)
         response: AIMessage = llm.invoke_with_log(prompt)
         return response.content.strip()
 
@@ -52,19 +56,59 @@ class DebateCreateProcessor:
         Generate a creative 3-word debate title based on user topic.
         """
         prompt = self.DEBATE_TITLE_PROMPT.format(USER_TOPIC=topic)
-        return self._invoke_llm(prompt)
+        return self._invoke_llm(prompt, task="debate_title")
 
-    def create_debate(self) -> models.Debate:
+    async def agenerate_debate_name(self, topic: str) -> str:
+        """
+        Async counterpart of `generate_debate_name`.
+        """
+        prompt = self.DEBATE_TITLE_PROMPT.format(USER_TOPIC=topic)
+        llm = await run_sync(llm_clients.for_task, "debate_title", org=self.org, project_id=self.project_id)
+        response: AIMessage = await llm.ainvoke_with_log(prompt, org=self.org)
+        return response.content.strip()
+
+    def create_debate(self, name: str = None) -> models.Debate:
         """
         Creates the Debate instance with LLM-generated name.
         """
         debate_data = self.request.data.copy()
-        debate_data["name"] = self.generate_debate_name(debate_data["topic"])
+        debate_data["name"] = name or self.generate_debate_name(debate_data["topic"])
         debate_data["agents"] = []  # Initialize empty agents list
         serializer = serializers.DebateSerializer(data=debate_data)
         serializer.is_valid(raise_exception=True)
         return serializer.save()
 
+    def _initial_state(self, debate: models.Debate) -> dict:
+        """Initial state for agent creation workflow."""
+        return {
+            "model": llm_clients.for_run(org=self.org, project_id=self.project_id, debate_id=debate.id),
+            "user_topic": debate.topic,
+            "initial_agents_prompt": "",
+            "initial_agents": [],
+            "agent_expansions": [],
+            "expanded_agents": [],
+            "org": self.org,
+            "_verbose": True
+        }
+
+    def _save_agents(self, debate: models.Debate, final_state: dict) -> list:
+        """Saves the expanded agents atomically and returns their SSE events."""
+        with transaction.atomic():
+            expanded_agents = parse_agents("\n".join(final_state["expanded_agents"]))
+            return list(self._process_agents(debate, expanded_agents))
+
+    def _creation_event(self, node: str, update: Optional[dict], expanded_agents: list) -> str:
+        """
+        SSE event for one graph update (event name = node name). Nodes only send
+        the keys they change; expansion events also carry every agent expanded
+        so far as `expanded_agents`, in the order the branches finished.
+        """
+        update = update or {}
+        if update.get("agent_expansions"):
+            expanded_agents.extend(expansion["agent"] for expansion in update["agent_expansions"])
+            update = {**update, "expanded_agents": list(expanded_agents)}
+        return self._send_event(node.replace(" ", "_").lower(), update)
+
     def _process_agents(self, debate: models.Debate, expanded_agents: List[Dict]):
         """
         Save expanded agents and link them to the debate.
@@ -79,7 +123,7 @@ class DebateCreateProcessor:
                 "agent_saved",
                 {"agent_id": str(agent.id), "agent_name": agent.name}
             )
-        debate.save()
+        debate.save(update_fields=["updated_at"])
 
     def process(self):
         """
@@ -90,31 +134,78 @@ class DebateCreateProcessor:
         4. Return list of expanded agents
         """
 
-        with transaction.atomic():
-            debate = self.create_debate()
+        # The debate is committed up front so the expansion branches, which log
+        # from their own threads/connections, can reference it.
+        debate = self.create_debate()
+
+        # Until the agents are saved, any way out (errors, and the GeneratorExit
+        # of a client disconnect) removes the half-built debate again
+        completed = False
+        try:
             yield self._send_event("debate_created", {"debate_id": str(debate.id)})
 
-            # Initial state for agent creation workflow
-            state = {
-                "model": LLMModel(project_id=self.project_id, debate_id=debate.id, agent_id=None),
-                "user_topic": debate.topic,
-                "initial_agents_prompt": "",
-                "agent_expansion_prompt": "",
-                "initial_agents": [],
-                "current_initial_agent_index": 0,
-                "expanded_agents": [],
-                "_verbose": True
-            }
+            state = self._initial_state(debate)
 
+            # Agent expansions run as parallel branches; each one is streamed as it finishes
             final_state = None
-            for chunk in debate_agents_creation_graph.stream(state, stream_mode="updates"):
-                node, state = list(chunk.items())[0]
-                yield self._send_event(node.replace(" ", "_").lower(), state)
-                final_state = state
+            expanded_agents = []
+            # Graph nodes (and their executor threads) inherit the organization from this scope
+            with context_storage.org_scope(self.org):
+                for chunk in get_debate_agents_creation_graph().stream(
+                    state,
+                    stream_mode="updates",
+                    config={"max_concurrency": settings.DEBATE_AGENT_EXPANSION_CONCURRENCY}
+                ):
+                    node, update = list(chunk.items())[0]
+                    yield self._creation_event(node, update, expanded_agents)
+                    final_state = update
+
+            agent_events = self._save_agents(debate, final_state)
+            completed = True
+        finally:
+            if not completed:
+                debate.delete()
+
+        yield from agent_events
+        yield self._send_event("debate_setup_complete", {"debate_id": str(debate.id)})
+
+    async def aprocess(self):
+        """
+        Async counterpart of `process`, used when served over ASGI.
+        LLM calls are awaited; ORM work runs on worker threads.
+        """
 
-            expanded_agents = parse_agents("\n".join(final_state["expanded_agents"]))
-            yield from self._process_agents(debate, expanded_agents)
-            yield self._send_event("debate_setup_complete", {"debate_id": str(debate.id)})
+        name = await self.agenerate_debate_name(self.request.data["topic"])
+        debate = await run_sync(self.create_debate, name, org=self.org)
+
+        # Also covers a client disconnect, which cancels or closes this generator
+        completed = False
+        try:
+            yield self._send_event("debate_created", {"debate_id": str(debate.id)})
+
+            state = await run_sync(self._initial_state, debate, org=self.org)
+
+            final_state = None
+            expanded_agents = []
+            with context_storage.org_scope(self.org):
+                async for chunk in get_debate_agents_creation_graph(use_async=True).astream(
+                    state,
+                    stream_mode="updates",
+                    config={"max_concurrency": settings.DEBATE_AGENT_EXPANSION_CONCURRENCY}
+                ):
+                    node, update = list(chunk.items())[0]
+                    yield self._creation_event(node, update, expanded_agents)
+                    final_state = update
+
+            agent_events = await run_sync(self._save_agents, debate, final_state, org=self.org)
+            completed = True
+        finally:
+            if not completed:
+                await run_sync(debate.delete, org=self.org)
+
+        for event in agent_events:
+            yield event
+        yield self._send_event("debate_setup_complete", {"debate_id": str(debate.id)})
 
 
 class DebateFlowProcessor:
@@ -124,7 +215,12 @@ class DebateFlowProcessor:
         self.request = request
         self.debate = debate
         self.project_id = debate.project.id
+        self.org = context_storage.get_current_org()
         self.last_node = None
+        self.parser = AgentResponseStreamingParser()
+        # Read up front: detached runs outlive the request
+        self.speak_intent_concurrency = self.get_speak_intent_concurrency()
+        self.encoder = SSEEventEncoder()
 
     # ------------------------------------------------------------------
     # SSE Utilities
@@ -133,12 +229,37 @@ class DebateFlowProcessor:
     def _send_event(self, event: str, data: dict):
         """Formats data as a Server-Sent Event."""
         
-        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        return self.encoder.encode(event, data)
 
-    def _send_status(self, message: str):
+    def _emit(self, event: str, data: dict) -> list:
+        """
+        Queues an event on the stream's encoder and returns the frames ready to
+        send. Agent tokens are coalesced; anything else flushes them first.
+        """
+        return self.encoder.push(event, data)
+
+    def _send_status(self, message: str) -> list:
         """Sends a UI status update."""
         
-        return self._send_event("status", {"message": message})
+        return self._emit("status", {"message": message})
+
+    # ------------------------------------------------------------------
+    # Run Settings
+    # ------------------------------------------------------------------
+
+    def get_speak_intent_concurrency(self) -> int:
+        """
+        Per-debate cap on parallel speak-intent calls (request override or settings
+        default), clamped to DEBATE_SPEAK_INTENT_MAX_CONCURRENCY.
+        """
+
+        default = settings.DEBATE_SPEAK_INTENT_CONCURRENCY
+        value = self.request.data.get("speak_intent_concurrency", default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            value = default
+        return min(max(1, value), max(1, settings.DEBATE_SPEAK_INTENT_MAX_CONCURRENCY))
 
     # ------------------------------------------------------------------
     # System Agents
@@ -157,7 +278,7 @@ class DebateFlowProcessor:
         for name, role, goal in definitions:
             agent, _ = models.Agent.objects.get_or_create(
                 name=name,
-                org_id = context_storage.get_current_org().id,
+                org_id = self.org.id,
                 project_id=self.project_id,
                 is_system_agent=True,
                 defaults={
@@ -177,31 +298,120 @@ class DebateFlowProcessor:
     # Streaming Helpers
     # ------------------------------------------------------------------
 
-    def _stream_agent_response(self, content: str, parser: AgentResponseStreamingParser):
-        """Streams agent response tokens to the UI."""
-        
-        event_data = parser.process_token(content)
-        event_type = event_data.get("event")
-
-        if event_type == "agent_start":
-            yield self._send_event(
-                "agent_response_start",
-                {
-                    "agent": event_data["agent"],
-                    "emotion": event_data["emotion"],
-                }
-            )
-
-        if event_type == "token":
-            yield self._send_event(
-                "agent_response_token",
-                {"content": event_data["content"]}
-            )
-
-        if event_type == "agent_end":
-            yield self._send_event("agent_response_end", {})
-
-        return None
+    def _stream_agent_response(self, events: list):
+        """Turns parser events into UI events."""
+
+        for event_data in events:
+            event_type = event_data["event"]
+
+            if event_type == "agent_start":
+                yield from self._emit(
+                    "agent_response_start",
+                    {
+                        "agent": event_data["agent"],
+                        "emotion": event_data["emotion"],
+                    }
+                )
+
+            elif event_type == "token":
+                yield from self._emit(
+                    "agent_response_token",
+                    {"content": event_data["content"]}
+                )
+
+            elif event_type == "agent_end":
+                yield from self._emit("agent_response_end", {})
+
+    def _finish_agent_response(self):
+        """Flushes the parser at the end of an LLM stream and resets it for the next one."""
+        events = self.parser.finish()
+        self.parser = AgentResponseStreamingParser()
+        yield from self._stream_agent_response(events)
+
+    def _handle_stream_message(self, message: AIMessage, meta: dict):
+        """Turns one streamed graph message into UI events."""
+
+        node = meta.get("langgraph_node")
+        content = message.content or ""
+        response_metadata = message.response_metadata or {}
+
+        # ----------------------------------------------------------
+        # Node: Super Agent Decision
+        # ----------------------------------------------------------
+        if node == "Super Agent Decision":
+            if self.last_node != node:
+                yield from self._send_status("Super Agent is evaluating the debate...")
+                self.last_node = node
+
+            if "finish_reason" in response_metadata:
+                yield from self._send_status("Super Agent decision complete.")
+
+        # ----------------------------------------------------------
+        # Node: Collect Speak Intentions
+        # ----------------------------------------------------------
+        elif node == "Collect Speak Intentions":
+            if self.last_node != node:
+                yield from self._send_status("Agents are declaring speak intentions...")
+                self.last_node = node
+
+            if "finish_reason" in response_metadata:
+                yield from self._send_status("Speak intentions collected.")
+
+        # ----------------------------------------------------------
+        # Node: Execute Debate Turn
+        # ----------------------------------------------------------
+        elif node == "Execute Debate Turn":
+            if content:
+                yield from self._stream_agent_response(self.parser.process_token(content))
+
+            if "finish_reason" in response_metadata:
+                yield from self._finish_agent_response()
+
+        # ----------------------------------------------------------
+        # Node: Generate Final Decision
+        # ----------------------------------------------------------
+        elif node == "Generate Final Decision":
+            if self.last_node != node:
+                yield from self._send_status(
+                    "Final Decision Agent is generating the conclusion..."
+                )
+                self.last_node = node
+
+            if content:
+                yield from self._stream_agent_response(self.parser.process_token(content))
+
+            if "finish_reason" in response_metadata:
+                yield from self._finish_agent_response()
+                yield from self._send_status("Final decision generated.")
+
+    def _initial_state(self, system_agents: Dict[str, models.Agent]) -> dict:
+        roster = DebateRoster.load(self.debate)
+        return {
+            "model": llm_clients.for_run(
+                org=self.org,
+                project_id=self.project_id,
+                debate_id=self.debate.id,
+            ),
+            # Control decisions run on the models routed for their task class
+            "task_models": {
+                task: llm_clients.for_task(task, org=self.org, project_id=self.project_id, debate_id=self.debate.id)
+                for task in ("super_agent", "speak_intent")
+            },
+            "debate": self.debate,
+            "roster": roster,
+            "prompt_builder": AgentPromptBuilder(roster.directory),
+            "summary_agent": system_agents["summary_agent"],
+            "super_agent": system_agents["super_agent"],
+            "final_decision_agent": system_agents["final_decision_agent"],
+            "memory": "",
+            "memory_buffer": DebateMemoryBuffer(),
+            "memory_budget": {},
+            "task_memory_budgets": {},
+            "super_agent_response": dict(),
+            "org" : self.org,
+            "speak_intent_concurrency": self.speak_intent_concurrency,
+            "_verbose": True,
+        }
 
     # ------------------------------------------------------------------
     # Main Processor
@@ -216,81 +426,34 @@ class DebateFlowProcessor:
         )
 
         system_agents = self.get_or_create_system_agents()
+        state = self._initial_state(system_agents)
 
-        state = {
-            "model": LLMModel(
-                project_id=self.project_id,
-                debate_id=self.debate.id,
-            ),
-            "debate": self.debate,
-            "summary_agent": system_agents["summary_agent"],
-            "super_agent": system_agents["super_agent"],
-            "final_decision_agent": system_agents["final_decision_agent"],
-            "memory": "",
-            "super_agent_response": dict(),
-            "org" : context_storage.get_current_org(),
-            "_verbose": True,
-        }
+        # Graph nodes (and their executor threads) inherit the organization from this scope
+        with context_storage.org_scope(self.org):
+            for message, meta in get_debate_graph().stream(
+                state, stream_mode="messages"
+            ):
+                yield from self._handle_stream_message(message, meta)
+
+        yield from self.encoder.flush()
+
+    async def aprocess(self):
+        """Async counterpart of `process`, used when served over ASGI."""
+
+        yield self._send_event(
+            "debate_started_or_continued",
+            {"debate_id": str(self.debate.id)}
+        )
+
+        system_agents = await run_sync(self.get_or_create_system_agents, org=self.org)
+        state = await run_sync(self._initial_state, system_agents, org=self.org)
+
+        with context_storage.org_scope(self.org):
+            async for message, meta in get_debate_graph(use_async=True).astream(
+                state, stream_mode="messages"
+            ):
+                for event in self._handle_stream_message(message, meta):
+                    yield event
 
-        parser = AgentResponseStreamingParser()
-
-        for message, meta in debate_graph.stream(
-            state, stream_mode="messages"
-        ):
-            message: AIMessage
-            node = meta.get("langgraph_node")
-            content = message.content or ""
-            response_metadata = message.response_metadata or {}
-
-            # ----------------------------------------------------------
-            # Node: Super Agent Decision
-            # ----------------------------------------------------------
-            if node == "Super Agent Decision":
-                if self.last_node != node:
-                    yield self._send_status("Super Agent is evaluating the debate...")
-                    self.last_node = node
-
-                if "finish_reason" in response_metadata:
-                    yield self._send_status("Super Agent decision complete.")
-
-            # ----------------------------------------------------------
-            # Node: Collect Speak Intentions
-            # ----------------------------------------------------------
-            elif node == "Collect Speak Intentions":
-                if self.last_node != node:
-                    yield self._send_status("Agents are declaring speak intentions...")
-                    self.last_node = node
-
-                if "finish_reason" in response_metadata:
-                    yield self._send_status("Speak intentions collected.")
-
-            # ----------------------------------------------------------
-            # Node: Execute Debate Turn
-            # ----------------------------------------------------------
-            elif node == "Execute Debate Turn":
-                if content:
-                    event = self._stream_agent_response(content, parser)
-                    if event:
-                        yield event
-
-                if "finish_reason" in response_metadata:
-                    parser = AgentResponseStreamingParser()
-
-            # ----------------------------------------------------------
-            # Node: Generate Final Decision
-            # ----------------------------------------------------------
-            elif node == "Generate Final Decision":
-                if self.last_node != node:
-                    yield self._send_status(
-                        "Final Decision Agent is generating the conclusion..."
-                    )
-                    self.last_node = node
-
-                if content:
-                    event = self._stream_agent_response(content, parser)
-                    if event:
-                        yield event
-
-                if "finish_reason" in response_metadata:
-                    parser = AgentResponseStreamingParser()
-                    yield self._send_status("Final decision generated.")
\ No newline at end of file
+        for event in self.encoder.flush():
+            yield event
@@ -54,6 +54,18 @@ class DebateSerializer(serializers.ModelSerializer, OrganizationSerializerMixin)
     class Meta:
         model = Debate
         fields = "__all__"
+        read_only_fields = ["next_message_order"]
+
+    def update(self, instance, validated_data):
+        # Save only the fields being changed, never the message order counter
+        agents = validated_data.pop("agents", None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data.keys(), "updated_at"])
+
+        if agents is not None:
+            instance.agents.set(agents)
+        return instance
 
 
 class DebateMessageSerializer(serializers.ModelSerializer, OrganizationSerializerMixin):
@@ -0,0 +1,219 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import uuid
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from core_app.models import Project, Agent, Debate, DebateMessage, LLMModelLog
+from core_app.utils import AgentResponseStreamingParser, SSEEventEncoder
+
+
+# Runs in a fresh interpreter: blocks outbound connections, then times the
+# imports a worker does at boot (views pull in processors and the workflows).
+IMPORT_PROBE = textwrap.dedent("""
+    import json, socket, time
+
+    attempts = []
+    def blocked(*args, **kwargs):
+        attempts.append(repr(args))
+        raise OSError("network access is disabled in this test")
+    socket.socket.connect = blocked
+    socket.create_connection = blocked
+    socket.getaddrinfo = blocked
+
+    import django
+    django.setup()
+
+    started = time.perf_counter()
+    import core_app.views, accounts_app.views, orgs_app.views
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({"seconds": elapsed, "network_attempts": attempts}))
+""")
+
+
+class ImportTimeBudgetTests(SimpleTestCase):
+    """Importing the views must not render diagrams, touch the network or compile graphs eagerly."""
+
+    BUDGET_SECONDS = 2.0
+
+    def test_views_import_within_budget_without_network(self):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings")}
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        self.assertEqual(report["network_attempts"], [])
+        self.assertLess(report["seconds"], self.BUDGET_SECONDS)
+
+
+class AgentResponseStreamingParserTests(SimpleTestCase):
+
+    HEADER = "AGENT: Ada\nEMOTION: calm\nRESPONSE: "
+
+    def parse(self, *chunks):
+        parser = AgentResponseStreamingParser()
+        events = []
+        for chunk in chunks:
+            events.extend(parser.process_token(chunk))
+        events.extend(parser.finish())
+        return events
+
+    def text(self, events):
+        return "".join(event["content"] for event in events if event["event"] == "token")
+
+    def test_header_is_parsed_into_agent_start(self):
+        events = self.parse("AGENT: Ada\nEMO", "TION: calm\nRESP", "ONSE: Hello\nEND\n")
+
+        self.assertEqual(events[0], {"event": "agent_start", "agent": "Ada", "emotion": "calm"})
+        self.assertEqual(self.text(events), "Hello")
+        self.assertEqual(events[-1], {"event": "agent_end"})
+
+    def test_end_marker_split_across_chunks(self):
+        for split in ("Hello\n", "Hello\nE", "Hello\nEN", "Hello\nEND"):
+            with self.subTest(split=split):
+                rest = ("Hello\nEND\nignored")[len(split):]
+                events = self.parse(self.HEADER, split, rest)
+
+                self.assertEqual(self.text(events), "Hello")
+                self.assertEqual([e["event"] for e in events].count("agent_end"), 1)
+
+    def test_ending_is_not_taken_as_end(self):
+        events = self.parse(self.HEADER, "Stop.\nEND", "ING soon\nEND\n")
+
+        self.assertEqual(self.text(events), "Stop.\nENDING soon")
+        self.assertEqual(events[-1], {"event": "agent_end"})
+
+    def test_trailing_end_without_newline(self):
+        events = self.parse(self.HEADER, "Hello\nEND")
+
+        self.assertEqual(self.text(events), "Hello")
+        self.assertEqual(events[-1], {"event": "agent_end"})
+
+    def test_missing_end_is_closed_by_finish(self):
+        events = self.parse(self.HEADER, "Hello\nEN")
+
+        self.assertEqual(self.text(events), "Hello\nEN")
+        self.assertEqual(events[-1], {"event": "agent_end"})
+
+
+class SSEEventEncoderTests(SimpleTestCase):
+
+    def frame(self, event, data):
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def test_tokens_are_coalesced_until_flush(self):
+        encoder = SSEEventEncoder(window_seconds=60, window_chars=100)
+
+        self.assertEqual(encoder.push("agent_response_token", {"content": "Hel"}), [])
+        self.assertEqual(encoder.push("agent_response_token", {"content": "lo"}), [])
+        self.assertEqual(encoder.flush(), [self.frame("agent_response_token", {"content": "Hello"})])
+        self.assertEqual(encoder.flush(), [])
+
+    def test_other_events_flush_buffered_tokens_first(self):
+        encoder = SSEEventEncoder(window_seconds=60, window_chars=100)
+        encoder.push("agent_response_token", {"content": "Hi"})
+
+        frames = encoder.push("agent_response_end", {"agent": "Ada"})
+
+        self.assertEqual(frames, [
+            self.frame("agent_response_token", {"content": "Hi"}),
+            self.frame("agent_response_end", {"agent": "Ada"}),
+        ])
+
+    def test_char_window_flushes(self):
+        encoder = SSEEventEncoder(window_seconds=60, window_chars=4)
+
+        self.assertEqual(encoder.push("agent_response_token", {"content": "ab"}), [])
+        self.assertEqual(
+            encoder.push("agent_response_token", {"content": "cd"}),
+            [self.frame("agent_response_token", {"content": "abcd"})],
+        )
+
+    def test_time_window_flushes(self):
+        encoder = SSEEventEncoder(window_seconds=0.05, window_chars=100)
+
+        with mock.patch("core_app.utils.time.monotonic", side_effect=[10.0, 10.01, 10.1]):
+            self.assertEqual(encoder.push("agent_response_token", {"content": "a"}), [])
+            self.assertEqual(
+                encoder.push("agent_response_token", {"content": "b"}),
+                [self.frame("agent_response_token", {"content": "ab"})],
+            )
+
+    def test_encode_state_reuses_unchanged_values(self):
+        encoder = SSEEventEncoder()
+        messages = [{"agent": "Ada"}]
+        state = {"messages": messages, "round": 1, "client": object()}
+
+        first = encoder.encode_state("state", state)
+        self.assertEqual(first, self.frame("state", {"messages": messages, "round": 1}))
+
+        with mock.patch("core_app.utils.json.dumps", wraps=json.dumps) as dumps:
+            state["round"] = 2
+            second = encoder.encode_state("state", state)
+
+        # Only the changed key is serialized again
+        self.assertEqual(dumps.call_count, 2)
+        self.assertEqual(second, self.frame("state", {"messages": messages, "round": 2}))
+
+    def test_encode_state_sees_in_place_mutation(self):
+        encoder = SSEEventEncoder()
+        messages = [{"agent": "Ada"}]
+        encoder.encode_state("state", {"messages": messages})
+
+        messages.append({"agent": "Grace"})
+
+        self.assertEqual(
+            encoder.encode_state("state", {"messages": messages}),
+            self.frame("state", {"messages": messages}),
+        )
+
+
+# (label, index the plan must use, queryset for an org / debate id)
+HOT_QUERIES = [
+    ("projects by org", "project_org_created_idx",
+        lambda org_id, debate_id: Project.all_objects.filter(org_id=org_id)[:50]),
+    ("agents by org", "agent_org_created_idx",
+        lambda org_id, debate_id: Agent.all_objects.filter(org_id=org_id)[:50]),
+    ("debates by org", "debate_org_created_idx",
+        lambda org_id, debate_id: Debate.all_objects.filter(org_id=org_id)[:50]),
+    ("messages by org", "debmsg_org_order_idx",
+        lambda org_id, debate_id: DebateMessage.all_objects.filter(org_id=org_id)[:50]),
+    ("debate memory", "debmsg_memory_order_idx",
+        lambda org_id, debate_id: DebateMessage.all_objects.filter(
+            org_id=org_id, debate_id=debate_id, is_memory_disabled=False
+        ).order_by("order")),
+    ("llm logs by org", "llmlog_org_ts_idx",
+        lambda org_id, debate_id: LLMModelLog.all_objects.filter(org_id=org_id).order_by("-timestamp")[:50]),
+    ("llm logs by debate", "llmlog_debate_ts_idx",
+        lambda org_id, debate_id: LLMModelLog.all_objects.filter(debate_id=debate_id).order_by("-timestamp")[:50]),
+]
+
+
+@skipUnless(connection.vendor == "postgresql", "query plans are only checked on PostgreSQL")
+class HotQueryIndexTests(TestCase):
+    """The org-scoped hot queries must keep using their composite indexes."""
+
+    def test_hot_queries_use_their_index(self):
+        org_id, debate_id = uuid.uuid4(), uuid.uuid4()
+
+        # Sequential scans are disabled so the empty test tables still show
+        # which index the planner would pick; SET LOCAL ends with the test's transaction.
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+        for label, index_name, build_queryset in HOT_QUERIES:
+            with self.subTest(label):
+                plan = build_queryset(org_id, debate_id).explain()
+                self.assertIn(index_name, plan)
@@ -6,6 +6,7 @@ from .views import (
     DebateViewSet,
     DebateMessageViewSet,
     StartOrContinueDebateView,
+    DebateEventsView,
 )
 
 router = DefaultRouter()
@@ -17,4 +18,5 @@ router.register("agents_messages", DebateMessageViewSet, basename="debate_messag
 urlpatterns = [
     path("", include(router.urls)),
     path("debates/<pk>/start_or_continue/", StartOrContinueDebateView.as_view(), name="start_or_continue_debate"),
+    path("debates/<pk>/events/", DebateEventsView.as_view(), name="debate_events"),
 ]
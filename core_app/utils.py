@@ -1,3 +1,12 @@
+import asyncio
+import copy
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Literal, Optional, TypedDict, Union
+from django.conf import settings
+
+
 def parse_agents(text):
     agents = []
     current = None
@@ -30,67 +39,326 @@ def parse_agents(text):
 
 
 
+class AgentStartEvent(TypedDict):
+    event: Literal["agent_start"]
+    agent: Optional[str]
+    emotion: Optional[str]
+
+
+class TokenEvent(TypedDict):
+    event: Literal["token"]
+    content: str
+
+
+class AgentEndEvent(TypedDict):
+    event: Literal["agent_end"]
+
+
+StreamEvent = Union[AgentStartEvent, TokenEvent, AgentEndEvent]
+
+
 class AgentResponseStreamingParser:
+    """
+    Incremental parser for streamed PAS agent responses:
+
+        AGENT: <name>
+        EMOTION: <emotion>
+        RESPONSE: <text ...>
+        END
+
+    Each call to `process_token` only scans the new text (plus a few held-back
+    characters, so markers split across tokens are still found) and returns the
+    events it produced. Call `finish` when the stream ends to flush the tail.
+    """
+
+    HEADER, RESPONSE, DONE = "header", "response", "done"
+    RESPONSE_MARKER = "RESPONSE:"
+    END_MARKER = "\nEND"
+
     def __init__(self):
-        self.buffer = ""
+        self.state = self.HEADER
+        self.header = ""
+        self.pending = ""
         self.agent_name = None
         self.emotion = None
-        self.in_response = False
-        self.meta_sent = False
-
-    def process_token(self, token: str):
-        # IMPORTANT: preserve space
-        self.buffer += token
-
-        # Step 1: Extract AGENT and EMOTION (once)
-        if not self.in_response:
-            if self.agent_name is None:
-                self.agent_name = self._extract_line("AGENT")
-
-            if self.emotion is None:
-                self.emotion = self._extract_line("EMOTION")
-
-            if "RESPONSE:" in self.buffer:
-                # Response starts here
-                after = self.buffer.split("RESPONSE:", 1)[1]
-
-                if not self.meta_sent:
-                    print({
-                        "event": "agent_start",
-                        "agent": self.agent_name,
-                        "emotion": self.emotion
-                    })
-                    self.meta_sent = True
-
-                self.in_response = True
-                self.buffer = ""
-
-                if after.strip():
-                    print({
-                        "event": "token",
-                        "content": after
-                    })
-                return
+        self.response_started = False
 
-        # Step 2: Stream response tokens
-        if self.in_response:
-            if "END" in self.buffer:
-                print({"event": "agent_end"})
-                return
+    def process_token(self, token: str) -> list[StreamEvent]:
+        if not token or self.state == self.DONE:
+            return []
+
+        if self.state == self.HEADER:
+            return self._process_header(token)
+        return self._process_response(token)
+
+    def finish(self) -> list[StreamEvent]:
+        """Flushes held-back text and closes the response if END never arrived."""
+        if self.state != self.RESPONSE:
+            return []
+
+        events = []
+        tail = self.pending
+        if tail.rstrip() == self.END_MARKER.strip() or tail.startswith(self.END_MARKER):
+            tail = ""
+        if tail:
+            events.append(self._token(tail))
+        self.pending = ""
+        self.state = self.DONE
+        events.append({"event": "agent_end"})
+        return events
+
+    # ------------------------------------------------------------------
+    # States
+    # ------------------------------------------------------------------
+
+    def _process_header(self, token: str) -> list[StreamEvent]:
+        # Only look at the new text plus enough overlap for a split marker
+        search_from = max(0, len(self.header) - len(self.RESPONSE_MARKER) + 1)
+        self.header += token
+
+        index = self.header.find(self.RESPONSE_MARKER, search_from)
+        if index == -1:
+            return []
+
+        header, after = self.header[:index], self.header[index + len(self.RESPONSE_MARKER):]
+        self.agent_name = self._extract_line(header, "AGENT")
+        self.emotion = self._extract_line(header, "EMOTION")
+        self.header = ""
+        self.state = self.RESPONSE
+
+        events: list[StreamEvent] = [{
+            "event": "agent_start",
+            "agent": self.agent_name,
+            "emotion": self.emotion,
+        }]
+        events.extend(self._process_response(after))
+        return events
+
+    def _process_response(self, token: str) -> list[StreamEvent]:
+        text = self.pending + token
+        self.pending = ""
+
+        if not self.response_started:
+            text = text.lstrip(" ")
+            if not text:
+                return []
+            self.response_started = True
+
+        events: list[StreamEvent] = []
+        search_from = 0
+        while True:
+            index = text.find(self.END_MARKER, search_from)
+            if index == -1:
+                break
+
+            after = index + len(self.END_MARKER)
+            if after == len(text):
+                # Can't tell "END" from e.g. "ENDING" yet; wait for the next token
+                if index:
+                    events.append(self._token(text[:index]))
+                self.pending = text[index:]
+                return events
+
+            if text[after].isspace():
+                if index:
+                    events.append(self._token(text[:index]))
+                self.state = self.DONE
+                events.append({"event": "agent_end"})
+                return events
+
+            search_from = index + 1
+
+        # Hold back a trailing partial "\nEN" so a split END marker is still caught
+        hold = 0
+        for size in range(min(len(self.END_MARKER) - 1, len(text)), 0, -1):
+            if text.endswith(self.END_MARKER[:size]):
+                hold = size
+                break
 
-            print({
-                "event": "token",
-                "content": token
-            })
+        if hold:
+            self.pending = text[-hold:]
+            text = text[:-hold]
+        if text:
+            events.append(self._token(text))
+        return events
 
-    def _extract_line(self, key: str):
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _token(self, content: str) -> TokenEvent:
+        return {"event": "token", "content": content}
+
+    def _extract_line(self, header: str, key: str):
         marker = f"{key}:"
-        if marker not in self.buffer:
+        index = header.find(marker)
+        if index == -1:
             return None
+        return header[index + len(marker):].split("\n", 1)[0].strip()
 
-        after = self.buffer.split(marker, 1)[1]
-        if "\n" not in after:
-            return None
 
-        return after.split("\n", 1)[0].strip()
+class SSEEventEncoder:
+    """
+    Builds SSE frames for one stream.
+
+    - Frame prefixes (`event: <name>\ndata: `) are built once per event name.
+    - Consecutive `agent_response_token` events pushed through `push` are
+      merged into one frame until `window_seconds` have passed since the first
+      buffered token or `window_chars` characters are waiting. Any other event
+      flushes them first, so ordering is preserved; call `flush` at the end.
+    - `encode_state` serializes state dicts key by key and reuses the JSON of
+      values that have not changed since the previous call.
+    """
+
+    COALESCED_EVENT = "agent_response_token"
+    STATE_TYPES = (str, int, list, dict)
+
+    def __init__(self, window_seconds: Optional[float] = None, window_chars: Optional[int] = None):
+        if window_seconds is None:
+            window_seconds = settings.SSE_TOKEN_COALESCE_MS / 1000
+        if window_chars is None:
+            window_chars = settings.SSE_TOKEN_COALESCE_MAX_CHARS
+
+        self.window_seconds = window_seconds
+        self.window_chars = window_chars
+        self._prefixes: dict[str, str] = {}
+        self._tokens: list[str] = []
+        self._token_chars = 0
+        self._first_token_at = 0.0
+        self._state_cache: dict[str, tuple[Any, str]] = {}
+
+    def _prefix(self, event: str) -> str:
+        prefix = self._prefixes.get(event)
+        if prefix is None:
+            prefix = self._prefixes[event] = f"event: {event}\ndata: "
+        return prefix
+
+    def encode(self, event: str, data: dict) -> str:
+        """Returns a single frame immediately (no coalescing)."""
+        return f"{self._prefix(event)}{json.dumps(data)}\n\n"
+
+    def encode_state(self, event: str, data: dict) -> str:
+        """Encodes the str/int/list/dict values of `data`, reusing unchanged values' JSON."""
+        parts = []
+        for key, value in data.items():
+            if not isinstance(value, self.STATE_TYPES):
+                continue
+
+            # Compared by value against a snapshot: graph nodes may mutate lists in place
+            cached = self._state_cache.get(key)
+            if cached is not None and cached[0] == value:
+                fragment = cached[1]
+            else:
+                fragment = f"{json.dumps(key)}: {json.dumps(value)}"
+                self._state_cache[key] = (copy.deepcopy(value), fragment)
+            parts.append(fragment)
+
+        return f"{self._prefix(event)}{{{', '.join(parts)}}}\n\n"
+
+    def push(self, event: str, data: dict) -> list[str]:
+        """Returns the frames that are ready to send after `event`."""
+        if event != self.COALESCED_EVENT:
+            frames = self.flush()
+            frames.append(self.encode(event, data))
+            return frames
+
+        content = data["content"]
+        if not self._tokens:
+            self._first_token_at = time.monotonic()
+        self._tokens.append(content)
+        self._token_chars += len(content)
+
+        if (
+            self._token_chars >= self.window_chars
+            or time.monotonic() - self._first_token_at >= self.window_seconds
+        ):
+            return self.flush()
+        return []
+
+    def flush(self) -> list[str]:
+        """Returns the buffered tokens as one frame (or nothing)."""
+        if not self._tokens:
+            return []
 
+        content = "".join(self._tokens)
+        self._tokens.clear()
+        self._token_chars = 0
+        return [self.encode(self.COALESCED_EVENT, {"content": content})]
+
+
+class Notifier:
+    """
+    Wakes readers of state guarded by `condition`: threads blocked in
+    `condition.wait_for` and coroutines in `wait_async`, on any event loop.
+    Writers change the state and call `notify` with the condition held.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self._async_waiters: set = set()
+
+    def notify(self):
+        # Called with the condition held
+        self.condition.notify_all()
+        for loop, waiter in list(self._async_waiters):
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                # The reader's loop is already closed
+                self._async_waiters.discard((loop, waiter))
+
+    async def wait_async(self, predicate, timeout: Optional[float] = None) -> bool:
+        """Waits without holding a thread until `predicate()` is true or `timeout` passes; returns the predicate."""
+        loop = asyncio.get_running_loop()
+        waiter = asyncio.Event()
+        with self.condition:
+            if predicate():
+                return True
+            self._async_waiters.add((loop, waiter))
+
+        try:
+            await asyncio.wait_for(waiter.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self.condition:
+                self._async_waiters.discard((loop, waiter))
+
+        with self.condition:
+            return predicate()
+
+
+SSE_HEARTBEAT = ": keep-alive\n\n"
+
+
+async def with_heartbeat(events: AsyncIterator[str], interval: float) -> AsyncIterator[str]:
+    """
+    Re-yields SSE `events`, sending a comment line whenever none arrived for
+    `interval` seconds. If the consumer goes away (Django cancels the response
+    on client disconnect), the pending step and the wrapped generator are
+    cancelled with it, which stops the underlying graph run.
+    """
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(events))
+
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield SSE_HEARTBEAT
+                continue
+
+            step, pending = pending, None
+            try:
+                yield step.result()
+            except StopAsyncIteration:
+                return
+    finally:
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration, Exception):
+                pass
+        await events.aclose()
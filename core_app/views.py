@@ -1,5 +1,10 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.http import StreamingHttpResponse
-from rest_framework import viewsets, generics
+from rest_framework import viewsets, generics, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from orgs_app import permissions
 from .models import Project, Agent, Debate, DebateMessage
 from .serializers import (
@@ -11,6 +16,63 @@ from .serializers import (
 from config import context_storage
 
 from .processors import DebateCreateProcessor, DebateFlowProcessor
+from .utils import with_heartbeat
+from .broadcast import broadcast_hub
+from .debate_runs import debate_runs
+from .renderers import EventStreamRenderer
+from helper.exceptions import SmoothException
+
+
+def sse_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def stream_events(request, processor):
+    """
+    Streams a processor's SSE events. Under ASGI the async path is used, so an
+    open stream does not hold a worker thread; idle streams get heartbeats and
+    a client disconnect cancels the graph run.
+    """
+    if isinstance(request._request, ASGIRequest):
+        events = with_heartbeat(processor.aprocess(), settings.SSE_HEARTBEAT_SECONDS)
+    else:
+        events = processor.process()
+    return sse_response(events)
+
+
+def stream_debate_run(request, debate, processor):
+    """
+    Streams a debate run. The run itself is detached: this request starts it
+    if nobody else has, and every viewer (this one included) subscribes to it,
+    so a viewer that disconnects stops neither the run nor the other viewers.
+    """
+    subscription = debate_runs.subscribe(debate.id, processor)
+    if isinstance(request._request, ASGIRequest):
+        events = with_heartbeat(broadcast_hub.astream(subscription), settings.SSE_HEARTBEAT_SECONDS)
+    else:
+        events = broadcast_hub.stream(subscription)
+    return sse_response(events)
+
+
+def stream_event_log(request, debate_id, offset: int):
+    """Streams a detached run's event log from `offset`; the run is unaffected by disconnects."""
+    if isinstance(request._request, ASGIRequest):
+        events = with_heartbeat(debate_runs.afollow(debate_id, offset), settings.SSE_HEARTBEAT_SECONDS)
+    else:
+        events = debate_runs.follow(debate_id, offset)
+    return sse_response(events)
+
+
+def get_last_event_id(request) -> int:
+    """Resume offset from the `Last-Event-ID` header (or `?last_event_id=`), 0 if absent."""
+    value = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 0
 
 class ProjectViewSet(viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
@@ -51,7 +113,7 @@ class DebateViewSet(viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         debate_processor = DebateCreateProcessor(request, project_id=request.data.get("project"))
-        return StreamingHttpResponse(debate_processor.process(), content_type='text/event-stream')
+        return stream_events(request, debate_processor)
 
 
 class DebateMessageViewSet(viewsets.ModelViewSet):
@@ -81,4 +143,36 @@ class StartOrContinueDebateView(generics.UpdateAPIView):
     def update(self, request, *args, **kwargs):
         debate = self.get_object()
         debate_processor = DebateFlowProcessor(request, debate=debate)
-        return StreamingHttpResponse(debate_processor.process(), content_type='text/event-stream')
+
+        if str(request.data.get("background", "")).lower() in ("1", "true", "yes"):
+            # If the debate is already running, the client attaches to that run
+            debate_runs.start(debate.id, debate_processor)
+            return Response(
+                {
+                    "debate_id": str(debate.id),
+                    "events_url": reverse("debate_events", kwargs={"pk": debate.pk}, request=request),
+                },
+                status=status.HTTP_202_ACCEPTED
+            )
+
+        return stream_debate_run(request, debate, debate_processor)
+
+
+class DebateEventsView(generics.RetrieveAPIView):
+    """
+    Attaches to a detached debate run. Replays the run's event log from
+    `Last-Event-ID` and then follows it live until the run finishes.
+    """
+    serializer_class = DebateSerializer
+    permission_classes = [permissions.IsOrgMember]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    def get_queryset(self):
+        return Debate.objects.all()
+
+    def retrieve(self, request, *args, **kwargs):
+        debate = self.get_object()
+        if not debate_runs.exists(debate.id):
+            raise SmoothException("No active or recent run for this debate", status_code=404)
+
+        return stream_event_log(request, debate.id, get_last_event_id(request))
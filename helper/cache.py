@@ -0,0 +1,117 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+from django.conf import settings
+from django.core.cache import cache
+
+
+# Backends whose entries live inside one worker process
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_cache_shared() -> bool:
+    """Whether the default Django cache is shared between worker processes (e.g. Redis)."""
+    return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
+
+
+MISSING = object()
+
+
+class LocalLRUCache:
+    """Small thread-safe in-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TieredCache:
+    """
+    Read-through cache: an in-process LRU in front of the Django cache.
+
+    Lookups that find nothing are cached too (for `negative_ttl`), so unknown
+    keys do not hit the database on every request. `invalidate` clears the
+    local tier of this process and the shared tier; other processes drop
+    their local copy once the (short) local TTL runs out.
+
+    The second tier is only used when the Django cache is shared between
+    workers (REDIS_URL). With the default per-process LocMemCache it would
+    keep a copy `invalidate` never reaches from other workers, so it is
+    skipped and staleness stays bounded by the local TTL either way.
+
+    Every call returns its own shallow copy of the cached value (model
+    instances included), so a caller mutating it, e.g. `refresh_from_db` or
+    attribute assignment in a view, cannot leak into other requests.
+    """
+
+    NEGATIVE = "__tiered_cache_negative__"
+
+    def __init__(self, prefix: str, ttl: float, local_ttl: float, negative_ttl: float, max_entries: int = 1024):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.local = LocalLRUCache(max_entries=max_entries, ttl=local_ttl)
+        self.shared = is_cache_shared()
+
+    def make_key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def is_negative(self, value: Any) -> bool:
+        return isinstance(value, str) and value == self.NEGATIVE
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Returns a copy of the cached value for `key`, calling `loader` on a miss. `None` means not found."""
+        value = self.local.get(key)
+        if value is MISSING:
+            value = cache.get(self.make_key(key), MISSING) if self.shared else MISSING
+            if value is MISSING:
+                value = loader()
+                if value is None:
+                    value = self.NEGATIVE
+                if self.shared:
+                    cache.set(self.make_key(key), value, self.negative_ttl if self.is_negative(value) else self.ttl)
+            self.local.set(key, value, self.negative_ttl if self.is_negative(value) else None)
+
+        return None if self.is_negative(value) else copy.copy(value)
+
+    def invalidate(self, key: str):
+        self.local.delete(key)
+        if self.shared:
+            cache.delete(self.make_key(key))
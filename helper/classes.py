@@ -1,10 +1,16 @@
 from __future__ import annotations
+import contextvars
+import hashlib
 import os
 import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Any, Optional
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 from langchain_core.messages import BaseMessage, AIMessage
+from helper.consonants import LLM_TASK_LIMITS
 
 load_dotenv()
 
@@ -20,9 +26,13 @@ class LLMModel(ChatGroq):
         object.__setattr__(self, "agent_id", agent_id)
 
 
-    def log_the_interaction(self, input : list[BaseMessage] | str, response : AIMessage, agent_id: Optional[str] = None, org_id : str = None):
+    def log_the_interaction(self, input : list[BaseMessage] | str, response : AIMessage, agent_id: Optional[str] = None, org_id : str = None, project_id : str = None, debate_id : str = None, extra_metadata : dict = None):
         input_messages = []
+        project_id = project_id or self.project_id
+        debate_id = debate_id or self.debate_id
         metadata = response.usage_metadata
+        if extra_metadata:
+            metadata = {**(metadata or {}), **extra_metadata}
 
         if isinstance(input, list):
             for message in input:
@@ -36,10 +46,33 @@ class LLMModel(ChatGroq):
                 "content": input
             })
         from core_app import serializers
+        from core_app.log_writer import llm_log_writer
+
+        if llm_log_writer.enabled:
+            # Write-behind: resolve the org now, the row is inserted later in a batch
+            if not org_id:
+                from config import context_storage
+                current_org = context_storage.get_current_org()
+                org_id = current_org.id if current_org else None
+            if not org_id:
+                raise ValueError("Organization could not be resolved for the LLM log.")
+
+            llm_log_writer.enqueue({
+                "org_id": org_id,
+                "project_id": project_id,
+                "debate_id": debate_id,
+                "agent_id": agent_id,
+                "model_name": self.model,
+                "metadata": metadata or {},
+                "input_messages": input_messages,
+                "output_response": response.content,
+                "status": "success",
+            })
+            return
 
         data = {
-            "project": self.project_id,
-            "debate": self.debate_id,
+            "project": project_id,
+            "debate": debate_id,
             "agent": agent_id,
             "model_name": self.model,
             "metadata": metadata,
@@ -53,38 +86,242 @@ class LLMModel(ChatGroq):
         if serializer.is_valid(raise_exception=True):
             serializer.save()
 
-    def invoke_with_log(self, input : Any, agent_id : str = None, org_id : str = None) -> Any:
-        response = super().invoke(input)
-
-        # Log the interaction
+    def log_interaction_safely(self, input : Any, response : AIMessage, agent_id : str = None, org_id : str = None, project_id : str = None, debate_id : str = None, metadata : dict = None):
+        """`log_the_interaction` for the `*_with_log` calls: a failed log write never fails the LLM call."""
         try:
-            self.log_the_interaction(input, response, agent_id, org_id)
+            self.log_the_interaction(input, response, agent_id, org_id, project_id, debate_id, metadata)
         except Exception as e:
             print(f"Error logging LLM interaction: {e}")
+
+    async def alog_interaction_safely(self, input : Any, response : AIMessage, agent_id : str = None, org : Any = None, project_id : str = None, debate_id : str = None, metadata : dict = None):
+        """Async counterpart of `log_interaction_safely`; blocking log writes run on a worker thread."""
+        from helper.utils import run_sync
+        from core_app.log_writer import llm_log_writer
+
+        org_id = org.id if org else None
+        # Buffered logging only enqueues, so no thread hop is needed
+        if llm_log_writer.enabled:
+            self.log_interaction_safely(input, response, agent_id, org_id, project_id, debate_id, metadata)
+        else:
+            await run_sync(self.log_interaction_safely, input, response, agent_id, org_id, project_id, debate_id, metadata, org=org)
+
+    def invoke_with_log(self, input : Any, agent_id : str = None, org_id : str = None, project_id : str = None, debate_id : str = None, metadata : dict = None) -> Any:
+        response = super().invoke(input)
+        self.log_interaction_safely(input, response, agent_id, org_id, project_id, debate_id, metadata)
         return response
 
+    async def ainvoke_with_log(self, input : Any, agent_id : str = None, org : Any = None, project_id : str = None, debate_id : str = None, metadata : dict = None) -> Any:
+        """Async counterpart of `invoke_with_log`."""
+        response = await super().ainvoke(input)
+        await self.alog_interaction_safely(input, response, agent_id, org, project_id, debate_id, metadata)
+        return response
 
-class ContextStorage:
-    """Thread-safe storage for request-scoped data."""
+
+class LLMCallContext:
+    """
+    Per-run handle on a shared `LLMModel` client.
+
+    Carries the project/debate ids into every call instead of storing them on
+    the client, so one client (and its connection pool) serves every debate.
+    Anything else (`get_num_tokens`, `model_name`, ...) is read from the client.
+    """
+
+    def __init__(self, client: LLMModel, project_id: str = None, debate_id: str = None, task: str = None):
+        self.client = client
+        self.project_id = project_id
+        self.debate_id = debate_id
+        self.task = task
+        # stop / max_tokens for the task's response schema (see LLM_TASK_LIMITS)
+        self.generation_limits = LLM_TASK_LIMITS.get(task, {}) if task else {}
+
+    def _is_truncated(self, response: AIMessage) -> bool:
+        """True if the task's max_tokens cap cut the response short."""
+        return "max_tokens" in self.generation_limits and response.response_metadata.get("finish_reason") == "length"
+
+    def _uncapped_limits(self) -> dict:
+        return {key: value for key, value in self.generation_limits.items() if key != "max_tokens"}
+
+    def _call_metadata(self, metadata: Optional[dict], started: float) -> dict:
+        # Task and latency go into LLMModelLog.metadata so the routing table can be tuned
+        return {
+            **(metadata or {}),
+            "task": self.task or "default",
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def invoke_with_log(self, input : Any, agent_id : str = None, org_id : str = None, metadata : dict = None) -> Any:
+        started = time.perf_counter()
+        response = self.client.invoke(input, **self.generation_limits)
+        if self._is_truncated(response):
+            # A cut-off schema loses its last fields (e.g. NEXT AGENT); retry once without the cap
+            response = self.client.invoke(input, **self._uncapped_limits())
+            metadata = {**(metadata or {}), "retried_uncapped": True}
+        self.client.log_interaction_safely(input, response, agent_id, org_id, self.project_id, self.debate_id, self._call_metadata(metadata, started))
+        return response
+
+    async def ainvoke_with_log(self, input : Any, agent_id : str = None, org : Any = None, metadata : dict = None) -> Any:
+        started = time.perf_counter()
+        response = await self.client.ainvoke(input, **self.generation_limits)
+        if self._is_truncated(response):
+            response = await self.client.ainvoke(input, **self._uncapped_limits())
+            metadata = {**(metadata or {}), "retried_uncapped": True}
+        await self.client.alog_interaction_safely(input, response, agent_id, org, self.project_id, self.debate_id, self._call_metadata(metadata, started))
+        return response
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+
+class LLMClientRegistry:
+    """
+    Process-wide registry of `LLMModel` clients keyed by (provider, model, api key hash).
+
+    Clients are built once and reused, so their HTTP keep-alive pools survive
+    across requests. At most `LLM_CLIENT_REGISTRY_MAX_CLIENTS` are kept; the
+    least recently used one is dropped first, and an organization's clients are
+    dropped when its `OrganizationLLMConfig` is saved or deleted. The api key comes from the organization's active
+    `OrganizationLLMConfig` for the provider, falling back to `GROQ_API_KEY`.
+    Only the Groq provider is backed by `LLMModel` today.
+
+    `for_task` picks the model from the task routing table (`LLM_TASK_ROUTES`),
+    so control calls can run on a smaller model than the debate turns.
+    """
+
+    DEFAULT_PROVIDER = "groq"
+    DEFAULT_MODEL = "llama-3.3-70b-versatile"
 
     def __init__(self):
-        self._storage = threading.local()
-        self._initialize_storage()
+        self._clients: OrderedDict[tuple, LLMModel] = OrderedDict()
+        # (provider, model_key) -> (available, expires_at)
+        self._available_models: dict[tuple, tuple[bool, float]] = {}
+        self._lock = threading.Lock()
+
+    def get_api_key(self, org: Any = None, provider: str = DEFAULT_PROVIDER) -> Optional[str]:
+        if org is not None:
+            from orgs_app.models import OrganizationLLMConfig
+
+            api_key = (
+                OrganizationLLMConfig.all_objects
+                .filter(org=org, provider__name=provider, is_active=True)
+                .values_list("api_key", flat=True)
+                .first()
+            )
+            if api_key:
+                return api_key
+        return os.environ.get("GROQ_API_KEY")
 
-    def _initialize_storage(self):
-        """Initialize storage dict if not present."""
-        if not hasattr(self._storage, "data"):
-            self._storage.data = {}
+    @staticmethod
+    def _key_digest(api_key: Optional[str]) -> Optional[str]:
+        # Registry keys never hold the raw api key
+        return hashlib.sha256(api_key.encode()).hexdigest() if api_key else None
+
+    def get_client(self, model_name: str = DEFAULT_MODEL, api_key: str = None, provider: str = DEFAULT_PROVIDER) -> LLMModel:
+        from django.conf import settings
+
+        key = (provider, model_name, self._key_digest(api_key))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = LLMModel(model_name=model_name, api_key=api_key)
+                self._clients[key] = client
+                while len(self._clients) > settings.LLM_CLIENT_REGISTRY_MAX_CLIENTS:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(key)
+        return client
+
+    def evict_api_key(self, api_key: Optional[str]):
+        """Drops every client built for `api_key` (e.g. a rotated or deleted org key)."""
+        digest = self._key_digest(api_key)
+        with self._lock:
+            for key in [key for key in self._clients if key[2] == digest]:
+                del self._clients[key]
+
+    def for_run(self, org: Any = None, project_id: str = None, debate_id: str = None, model_name: str = DEFAULT_MODEL, provider: str = DEFAULT_PROVIDER, task: str = None) -> LLMCallContext:
+        """Shared client for the org's credentials, bound to this run's ids."""
+        api_key = self.get_api_key(org, provider)
+        client = self.get_client(model_name, api_key, provider)
+        return LLMCallContext(client, project_id=project_id, debate_id=debate_id, task=task)
+
+    # ------------------------------------------------------------------
+    # Task routing
+    # ------------------------------------------------------------------
+
+    def get_task_routes(self) -> dict:
+        from django.conf import settings
+        from helper.consonants import LLM_TASK_ROUTES
+
+        return {**LLM_TASK_ROUTES, **getattr(settings, "LLM_TASK_ROUTES", {})}
+
+    def is_model_available(self, provider: str, model_key: str) -> bool:
+        """
+        True if the model is active in the synced model table, or in `LLM_REGISTRY`
+        before the first sync. Cached for `LLM_MODEL_AVAILABILITY_TTL_SECONDS`, and
+        dropped in this process when a model or provider is saved.
+        """
+        from django.conf import settings
+
+        key = (provider, model_key)
+        cached = self._available_models.get(key)
+        if cached is None or cached[1] <= time.monotonic():
+            from orgs_app.models import LLMModel as OrgLLMModel
+            from helper.consonants import LLM_REGISTRY
+
+            synced = OrgLLMModel.objects.filter(provider__name=provider, model_key=model_key)
+            if synced.exists():
+                available = synced.filter(is_active=True, provider__is_active=True).exists()
+            else:
+                provider_data = LLM_REGISTRY.get(provider, {})
+                available = provider_data.get("is_active", False) and any(
+                    model_data["model_key"] == model_key and model_data.get("is_active", True)
+                    for model_data in provider_data.get("models", [])
+                )
+            self._available_models[key] = (available, time.monotonic() + settings.LLM_MODEL_AVAILABILITY_TTL_SECONDS)
+            return available
+        return cached[0]
+
+    def invalidate_model_availability(self):
+        self._available_models.clear()
+
+    def resolve_task_model(self, task: str) -> tuple[str, str]:
+        """(provider, model) for a task class; unrouted or unavailable routes use the default model."""
+        route = self.get_task_routes().get(task)
+        if route:
+            provider, model_key = route.get("provider", self.DEFAULT_PROVIDER), route["model_key"]
+            # Only Groq models are served by `LLMModel` today
+            if provider == self.DEFAULT_PROVIDER and self.is_model_available(provider, model_key):
+                return provider, model_key
+        return self.DEFAULT_PROVIDER, self.DEFAULT_MODEL
+
+    def for_task(self, task: str, org: Any = None, project_id: str = None, debate_id: str = None) -> LLMCallContext:
+        """Like `for_run`, on the model routed for `task`."""
+        provider, model_name = self.resolve_task_model(task)
+        return self.for_run(org, project_id, debate_id, model_name=model_name, provider=provider, task=task)
+
+
+class ContextStorage:
+    """
+    Request-scoped data (current user / organization) kept in a ContextVar.
+
+    Every thread, asyncio task and copied context (executor tasks, LangGraph
+    nodes, `sync_to_async` hops) sees the values of the context it was started
+    from, and changes made inside it stay there. Prefer `scope` / `org_scope`,
+    which restore the previous values on exit, over bare setters and `clear()`.
+    """
+
+    def __init__(self, name: str = "context_storage"):
+        self._data: contextvars.ContextVar[dict] = contextvars.ContextVar(name, default={})
 
     def store(self, key: str, value: Any):
-        """Store ANY Python object in thread-local storage."""
-        self._initialize_storage()
-        self._storage.data[key] = value
+        """Store ANY Python object for the current context."""
+        # Copy on write: contexts copied from this one must not see later changes
+        data = dict(self._data.get())
+        data[key] = value
+        self._data.set(data)
 
     def retrieve(self, key: str, default: Optional[Any] = None) -> Any:
         """Retrieve ANY Python object."""
-        self._initialize_storage()
-        return self._storage.data.get(key, default)
+        return self._data.get().get(key, default)
 
     # ------------------------------------------------------------------
     # USER (No User import needed — stores runtime instance)
@@ -104,13 +341,63 @@ class ContextStorage:
     def get_current_org(self, default=None):
         return self.retrieve("current_org", default)
 
+    # ------------------------------------------------------------------
+    # SCOPES
+    # ------------------------------------------------------------------
+    @contextmanager
+    def scope(self, inherit: bool = True, **values):
+        """
+        Sets `values` (e.g. current_org=org) until the block exits, then restores
+        what was there before. With `inherit=False` the block starts empty.
+        """
+        data = dict(self._data.get()) if inherit else {}
+        data.update(values)
+        token = self._data.set(data)
+        try:
+            yield
+        finally:
+            self._reset(token)
+
+    def org_scope(self, org: Any):
+        """`scope(current_org=org)`; with org=None the inherited organization is kept."""
+        if org is None:
+            return self.scope()
+        return self.scope(current_org=org)
+
+    def bind_stream(self, content):
+        """
+        Wraps a (sync or async) response stream so it is iterated with the values
+        stored right now, even after the view and middleware have returned.
+        """
+        values = self._data.get()
+
+        if hasattr(content, "__aiter__"):
+            async def astream():
+                with self.scope(inherit=False, **values):
+                    async for chunk in content:
+                        yield chunk
+            return astream()
+
+        def stream():
+            with self.scope(inherit=False, **values):
+                yield from content
+        return stream()
+
+    def _reset(self, token: contextvars.Token):
+        try:
+            self._data.reset(token)
+        except ValueError:
+            # Exited in another context than it was entered in (a generator
+            # resumed from a different task); restore the old values there.
+            old_value = token.old_value
+            self._data.set({} if old_value is contextvars.Token.MISSING else old_value)
+
     # ------------------------------------------------------------------
     def show(self):
-        self._initialize_storage()
-        print(self._storage.data)
+        print(self._data.get())
 
     def clear(self):
-        self._storage.data = {}
+        self._data.set({})
    
         
 # class TrimMessages:
@@ -68,3 +68,30 @@ LLM_REGISTRY = {
         ],
     },
 }
+
+
+# Task class → model used for it. Short control decisions go to a small, fast
+# model; tasks not listed here use the run's default model. Overridable per
+# deployment with the LLM_TASK_ROUTES setting.
+LLM_TASK_ROUTES = {
+    "debate_title": {"provider": "groq", "model_key": "llama-3.1-8b-instant"},
+    "super_agent": {"provider": "groq", "model_key": "llama-3.1-8b-instant"},
+    "speak_intent": {"provider": "groq", "model_key": "llama-3.1-8b-instant"},
+}
+
+
+# Generation limits applied to every call of a routed task class. Control
+# responses follow a fixed PAS schema, so generation stops at its "END" line
+# (the stop sequence itself is not returned) and max_tokens is the schema's
+# size with headroom for the one free-text line:
+#   - debate_title: exactly 3 words
+#   - super_agent: AGENT / TASK / one-line REASONING / NEXT AGENT
+#   - speak_intent: AGENT / WANT_TO_SPEAK / EMOTION / one-line REASON / PRIORITY SCORE
+# A response cut off by max_tokens is retried once without it (LLMCallContext), so
+# a long REASONING line costs a second call instead of losing NEXT AGENT.
+# Routing one of these tasks to a reasoning model needs a larger max_tokens.
+LLM_TASK_LIMITS = {
+    "debate_title": {"max_tokens": 16},
+    "super_agent": {"stop": ["\nEND"], "max_tokens": 160},
+    "speak_intent": {"stop": ["\nEND"], "max_tokens": 128},
+}
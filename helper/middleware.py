@@ -1,6 +1,6 @@
 from django.http import JsonResponse
 from config import context_storage
-from orgs_app.models import Organization
+from orgs_app.cache import get_organization
 
 
 class OrganizationAuthMiddleware:
@@ -8,29 +8,31 @@ class OrganizationAuthMiddleware:
         self.get_response = get_response
 
     def authenticate_organization(self, org_id):
-        return Organization.objects.filter(id=org_id).first()
+        return get_organization(org_id)
 
     def __call__(self, request):
         org_id = request.headers.get("X-Org-ID")
+        org = None
 
         if org_id:
-            context_storage.clear()
             org_id = str(org_id).strip()
 
             org = self.authenticate_organization(org_id)
 
             if not org:
-                context_storage.clear()
                 return JsonResponse(
                     {"detail": "Invalid organization or organization not found"},
                     status=403
                 )
 
-            context_storage.set_current_org(org)
+        # Each request starts from an empty context; whatever the view stores
+        # (organization, user) is dropped when the scope exits.
+        with context_storage.scope(inherit=False, current_org=org):
+            response = self.get_response(request)
 
-        response = self.get_response(request)
-
-        if not getattr(response, "streaming", False):
-            context_storage.clear()
+            # Streams are consumed after this returns; carry the request's
+            # context into their iteration instead of leaving it set.
+            if getattr(response, "streaming", False):
+                response.streaming_content = context_storage.bind_stream(response.streaming_content)
 
         return response
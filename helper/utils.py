@@ -1,8 +1,11 @@
 import jwt
+from asgiref.sync import sync_to_async
 from datetime import datetime, timedelta
 from django.conf import settings  
 from django.contrib.sessions.backends.db import SessionStore
+from django.db import close_old_connections
 from .exceptions import SmoothException
+from config import context_storage
 from datetime import datetime, timedelta
 from django.conf import settings
 
@@ -54,3 +57,22 @@ def create_session(data):
 def delete_session(session_key):
     session = SessionStore(session_key=session_key)
     session.delete()
+
+
+
+# Async
+async def run_sync(func, *args, org=None, **kwargs):
+    """
+    Runs a blocking callable (ORM, sync LLM call) from async code on a worker
+    thread, with `org` (or the caller's organization) current for the call.
+    """
+    def call():
+        try:
+            with context_storage.org_scope(org):
+                return func(*args, **kwargs)
+        finally:
+            # Executor threads outlive requests; drop connections that are past
+            # CONN_MAX_AGE or broken, as Django does at request boundaries
+            close_old_connections()
+
+    return await sync_to_async(call, thread_sensitive=False)()
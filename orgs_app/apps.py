@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AgentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orgs_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
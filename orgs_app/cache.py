@@ -0,0 +1,70 @@
+import uuid
+from typing import Optional
+from django.conf import settings
+from helper.cache import TieredCache
+from .models import Organization, OrganizationMember
+
+
+organization_cache = TieredCache(
+    prefix="org",
+    ttl=settings.ORG_CACHE_TTL_SECONDS,
+    local_ttl=settings.ORG_CACHE_LOCAL_TTL_SECONDS,
+    negative_ttl=settings.ORG_CACHE_NEGATIVE_TTL_SECONDS,
+    max_entries=settings.ORG_CACHE_LOCAL_MAX_ENTRIES,
+)
+
+
+def get_organization(org_id) -> Optional[Organization]:
+    """Organization by id through the shared cache; None for unknown or malformed ids."""
+    try:
+        org_id = str(uuid.UUID(str(org_id)))
+    except ValueError:
+        return None
+
+    return organization_cache.get_or_load(
+        org_id,
+        lambda: Organization.objects.filter(id=org_id).first()
+    )
+
+
+# Roles gate permissions, so the in-process copy is kept much shorter than for orgs:
+# other workers see a removal or demotion within AUTH_CACHE_LOCAL_TTL_SECONDS.
+membership_cache = TieredCache(
+    prefix="org_member",
+    ttl=settings.ORG_MEMBER_CACHE_TTL_SECONDS,
+    local_ttl=settings.AUTH_CACHE_LOCAL_TTL_SECONDS,
+    negative_ttl=settings.ORG_CACHE_NEGATIVE_TTL_SECONDS,
+    max_entries=settings.ORG_CACHE_LOCAL_MAX_ENTRIES,
+)
+
+
+def membership_key(user_id, org_id) -> str:
+    return f"{user_id}:{org_id}"
+
+
+def get_org_member(user, org, request=None) -> Optional[OrganizationMember]:
+    """
+    The user's membership in `org`, or None.
+
+    Memoized on `request` (so permissions and the view share one lookup) and
+    cached across requests per (user, org). A change is visible at once on the
+    worker that made it and within AUTH_CACHE_LOCAL_TTL_SECONDS on the others.
+    """
+    if user is None or not user.is_authenticated or org is None:
+        return None
+
+    key = membership_key(user.pk, org.pk)
+    memo = getattr(request, "_org_members", None) if request is not None else None
+    if memo is not None and key in memo:
+        return memo[key]
+
+    member = membership_cache.get_or_load(
+        key,
+        lambda: OrganizationMember.all_objects.filter(user_id=user.pk, org_id=org.pk).first()
+    )
+
+    if request is not None:
+        if memo is None:
+            memo = request._org_members = {}
+        memo[key] = member
+    return member
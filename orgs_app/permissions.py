@@ -1,19 +1,13 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS, IsAuthenticated
 from orgs_app.models import OrganizationMember
 from config import context_storage
+from orgs_app.cache import get_org_member
 
 
 def get_org():
     return context_storage.get_current_org()
 
 
-def get_org_member(user, organization):
-    try:
-        return OrganizationMember.objects.get(user=user, org=organization)
-    except OrganizationMember.DoesNotExist:
-        return None
-
-
 class BaseOrgRolePermission(BasePermission):
     """
     Base permission that checks if the user has one of the allowed roles.
@@ -26,7 +20,7 @@ class BaseOrgRolePermission(BasePermission):
         if not org:
             return False
 
-        member = get_org_member(request.user, org)
+        member = get_org_member(request.user, org, request)
         if not member:
             return False
 
@@ -97,12 +91,8 @@ class CanManageRoles(BasePermission):
         if not current_org:
             return False
 
-        try:
-            current_member = OrganizationMember.objects.get(
-                user=request.user,
-                org=current_org
-            )
-        except OrganizationMember.DoesNotExist:
+        current_member = get_org_member(request.user, current_org, request)
+        if not current_member:
             return False
 
         # Current user's role power
@@ -0,0 +1,37 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Organization, OrganizationMember, LLMProvider, LLMModel, OrganizationLLMConfig
+from .cache import organization_cache, membership_cache, membership_key
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def invalidate_organization_cache(sender, instance, **kwargs):
+    organization_cache.invalidate(str(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=OrganizationMember)
+def invalidate_membership_cache(sender, instance, **kwargs):
+    membership_cache.invalidate(membership_key(instance.user_id, instance.org_id))
+
+
+@receiver([post_save, post_delete], sender=LLMProvider)
+@receiver([post_save, post_delete], sender=LLMModel)
+def invalidate_model_availability(sender, instance, **kwargs):
+    from config import llm_clients
+    llm_clients.invalidate_model_availability()
+
+
+@receiver(pre_save, sender=OrganizationLLMConfig)
+def evict_replaced_llm_clients(sender, instance, **kwargs):
+    # A rotated key's clients would otherwise stay alive until the LRU drops them
+    if instance.pk:
+        from config import llm_clients
+        old_api_key = sender.all_objects.filter(pk=instance.pk).values_list("api_key", flat=True).first()
+        if old_api_key and old_api_key != instance.api_key:
+            llm_clients.evict_api_key(old_api_key)
+
+
+@receiver([post_save, post_delete], sender=OrganizationLLMConfig)
+def evict_llm_clients(sender, instance, **kwargs):
+    from config import llm_clients
+    llm_clients.evict_api_key(instance.api_key)
@@ -26,13 +26,9 @@ class OrganizationMemberViewSet(viewsets.ModelViewSet):
         if not current_org:
             return models.OrganizationMember.objects.none()
 
-        # Get current user's role
-        try:
-            current_member = models.OrganizationMember.objects.get(
-                user=self.request.user,
-                org=current_org
-            )
-        except models.OrganizationMember.DoesNotExist:
+        # Get current user's role (shared with the permission checks of this request)
+        current_member = permissions.get_org_member(self.request.user, current_org, self.request)
+        if not current_member:
             return models.OrganizationMember.objects.none()
 
         ROLE_HIERARCHY = {
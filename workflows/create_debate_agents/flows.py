@@ -1,70 +1,78 @@
+from functools import lru_cache
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
 from .schemas import DebateAgentsCreationState
 from .nodes import (
     conntect_org,
     init_initial_agents_creation_prompt,
     call_model_for_initial_agents,
-    init_agent_expansion_prompt,
-    call_model_for_agent_expansion,
-    increment_initial_agent_index
+    expand_single_agent,
+    collect_expanded_agents,
+    acall_model_for_initial_agents,
+    aexpand_single_agent
 )
 
-# ============================
-# Build Graph
-# ============================
-
-workflow = StateGraph(DebateAgentsCreationState)
-
 # ----------------------------
-# Nodes
+# Map Step (one branch per initial agent)
 # ----------------------------
-workflow.add_node("Connect to Current Organization", conntect_org)
-workflow.add_node("Prepare Initial Agents Prompt", init_initial_agents_creation_prompt)
-workflow.add_node("Generate Initial Agents", call_model_for_initial_agents)
-workflow.add_node("Prepare Agent Expansion Prompt", init_agent_expansion_prompt)
-workflow.add_node("Expand Single Agent", call_model_for_agent_expansion)
-workflow.add_node("Move To Next Agent", increment_initial_agent_index)
+def fan_out_agent_expansion(state: DebateAgentsCreationState):
+    if not state["initial_agents"]:
+        return "Collect Expanded Agents"
 
-# ----------------------------
-# Edges (Readable transitions)
-# ----------------------------
-workflow.add_edge(START, "Connect to Current Organization")
-workflow.add_edge("Connect to Current Organization", "Prepare Initial Agents Prompt")
-workflow.add_edge("Prepare Initial Agents Prompt", "Generate Initial Agents")
-workflow.add_edge("Generate Initial Agents", "Prepare Agent Expansion Prompt")
-workflow.add_edge("Prepare Agent Expansion Prompt", "Expand Single Agent")
-workflow.add_edge("Expand Single Agent", "Move To Next Agent")
+    return [
+        Send("Expand Single Agent", {
+            "model": state["model"],
+            "user_topic": state["user_topic"],
+            "initial_agent": initial_agent,
+            "index": index,
+            "org": state["org"],
+            "_verbose": state["_verbose"],
+        })
+        for index, initial_agent in enumerate(state["initial_agents"])
+    ]
 
-# ----------------------------
-# Conditional Logic
-# ----------------------------
-def should_continue_expansion(state: DebateAgentsCreationState):
-    return (
-        "STOP"
-        if state["current_initial_agent_index"] >= len(state["initial_agents"])
-        else "CONTINUE"
-    )
 
-workflow.add_conditional_edges(
-    "Move To Next Agent",
-    should_continue_expansion,
-    {
-        "CONTINUE": "Prepare Agent Expansion Prompt",
-        "STOP": END,
-    }
-)
+def build_debate_agents_creation_workflow(use_async: bool = False) -> StateGraph:
+    """
+    Builds the agent creation workflow. The async graph only swaps the two
+    LLM-calling nodes for their async variants.
+    """
 
-# ----------------------------
-# Compile Graph
-# ----------------------------
-debate_agents_creation_graph = workflow.compile()
+    # ============================
+    # Build Graph
+    # ============================
 
-# ----------------------------
-# Visualize Graph
-# ----------------------------
-graph_png = debate_agents_creation_graph.get_graph(xray=True).draw_mermaid_png()
-image_file = "Debate Agents Creation Workflow.png"
-with open(image_file, "wb") as file:
-    file.write(graph_png)
+    workflow = StateGraph(DebateAgentsCreationState)
 
+    # ----------------------------
+    # Nodes
+    # ----------------------------
+    workflow.add_node("Connect to Current Organization", conntect_org)
+    workflow.add_node("Prepare Initial Agents Prompt", init_initial_agents_creation_prompt)
+    workflow.add_node("Generate Initial Agents", acall_model_for_initial_agents if use_async else call_model_for_initial_agents)
+    workflow.add_node("Expand Single Agent", aexpand_single_agent if use_async else expand_single_agent)
+    workflow.add_node("Collect Expanded Agents", collect_expanded_agents)
 
+    # ----------------------------
+    # Edges (Readable transitions)
+    # ----------------------------
+    workflow.add_edge(START, "Connect to Current Organization")
+    workflow.add_edge("Connect to Current Organization", "Prepare Initial Agents Prompt")
+    workflow.add_edge("Prepare Initial Agents Prompt", "Generate Initial Agents")
+    workflow.add_edge("Expand Single Agent", "Collect Expanded Agents")
+    workflow.add_edge("Collect Expanded Agents", END)
+
+    workflow.add_conditional_edges(
+        "Generate Initial Agents",
+        fan_out_agent_expansion,
+        ["Expand Single Agent", "Collect Expanded Agents"]
+    )
+
+    return workflow
+
+# ----------------------------
+# Compile Graph (lazily, once per process)
+# ----------------------------
+@lru_cache(maxsize=None)
+def get_debate_agents_creation_graph(use_async: bool = False):
+    return build_debate_agents_creation_workflow(use_async=use_async).compile()
@@ -1,6 +1,6 @@
 import logging
 from langchain_core.messages import AIMessage
-from .schemas import DebateAgentsCreationState
+from .schemas import DebateAgentsCreationState, AgentExpansionTask
 from .prompts import INITIAL_AGENTS_CREATION_PROMPT, AGENT_EXPANSION_PROMPT
 from config import context_storage
 
@@ -34,7 +34,7 @@ def green_log(message: str):
 
 def conntect_org(state : DebateAgentsCreationState):
     context_storage.set_current_org(state["org"])
-    return state
+    return {}
 
 
 def init_initial_agents_creation_prompt(state: DebateAgentsCreationState):
@@ -44,10 +44,25 @@ def init_initial_agents_creation_prompt(state: DebateAgentsCreationState):
 
     user_topic = state['user_topic']    
     initial_agents_prompt = INITIAL_AGENTS_CREATION_PROMPT.format(USER_TOPIC=user_topic)
-    state['initial_agents_prompt'] = initial_agents_prompt
-    return state
+    return {"initial_agents_prompt": initial_agents_prompt}
             
 
+def split_initial_agents(content: str) -> list[str]:
+    if "\n\n" in content:
+        initial_agents = content.split("\n\n")
+    elif "\nEND" in content:
+        initial_agents = content.split("\nEND")[:-1]
+    else:
+        initial_agents = content.split("AGENT\n")[1:]
+
+    if len(initial_agents[-1]) < 10:
+        initial_agents.pop(-1) 
+    elif len(initial_agents[0]) < 10:
+        initial_agents.pop(0) 
+
+    return initial_agents
+
+
 def call_model_for_initial_agents(state: DebateAgentsCreationState):
     _verbose = state['_verbose']
     if _verbose:
@@ -61,52 +76,72 @@ def call_model_for_initial_agents(state: DebateAgentsCreationState):
         green_log("✅ Initial agents created")
         green_log(f"Response: \n{response.content}")
 
-    if "\n\n" in response.content:
-        initial_agents = response.content.split("\n\n")
-    elif "\nEND" in response.content:
-        initial_agents = response.content.split("\nEND")[:-1]
-    else:
-        initial_agents = response.content.split("AGENT\n")[1:]
-
-    if len(initial_agents[-1]) < 10:
-        initial_agents.pop(-1) 
-    elif len(initial_agents[0]) < 10:
-        initial_agents.pop(0) 
-    
-    state['initial_agents'] = initial_agents
-    return state 
+    return {"initial_agents": split_initial_agents(response.content)}
     
 
-def init_agent_expansion_prompt(state: DebateAgentsCreationState):
-    current_index = state['current_initial_agent_index']
-    initial_agent = state['initial_agents'][current_index].strip()
-    user_topic = state['user_topic']
-    agent_expansion_prompt = AGENT_EXPANSION_PROMPT.format(
-        USER_TOPIC=user_topic,
-        BASE_AGENT=initial_agent
+def build_agent_expansion_prompt(state: AgentExpansionTask) -> str:
+    if state['_verbose']:
+        green_log(f"🤖 Calling model for agent expansion #{state['index'] + 1}")
+
+    return AGENT_EXPANSION_PROMPT.format(
+        USER_TOPIC=state['user_topic'],
+        BASE_AGENT=state['initial_agent'].strip()
     )
-    state['agent_expansion_prompt'] = agent_expansion_prompt
-    return state
-    
-def call_model_for_agent_expansion(state: DebateAgentsCreationState):
+
+
+def agent_expansion_update(state: AgentExpansionTask, response: AIMessage) -> dict:
+    if state['_verbose']:
+        green_log("✅ Agent expanded")
+        green_log(f"Response: \n{response.content}")
+
+    return {
+        "agent_expansions": [{"index": state['index'], "agent": response.content}]
+    }
+
+
+def expand_single_agent(state: AgentExpansionTask):
+    """Map step: expands one initial agent. Runs as a parallel `Send` branch."""
+    context_storage.set_current_org(state["org"])
+
+    model = state['model']
+    agent_expansion_prompt = build_agent_expansion_prompt(state)
+    response : AIMessage = model.invoke_with_log(agent_expansion_prompt)
+
+    return agent_expansion_update(state, response)
+
+
+def collect_expanded_agents(state: DebateAgentsCreationState):
+    """Reduce step: restores the initial agent order once every branch is done."""
+    expansions = sorted(state['agent_expansions'], key=lambda expansion: expansion["index"])
+    return {
+        "expanded_agents": [expansion["agent"] for expansion in expansions]
+    }
+
+
+# =========================
+# ASYNC VARIANTS
+# =========================
+# Used by `get_debate_agents_creation_graph(use_async=True)`; the LLM calls are awaited and
+# the log writes carry state["org"] to their worker thread.
+
+async def acall_model_for_initial_agents(state: DebateAgentsCreationState):
     _verbose = state['_verbose']
     if _verbose:
-        green_log("🤖 Calling model for agent expansion")
-    
+        green_log("🤖 Calling model for initial agents creation")
+
     model = state['model']
-    agent_expansion_prompt = state['agent_expansion_prompt']
-    response : AIMessage = model.invoke_with_log(agent_expansion_prompt)
+    response : AIMessage = await model.ainvoke_with_log(state['initial_agents_prompt'], org=state["org"])
 
     if _verbose:
-        green_log("✅ Agent expanded")
+        green_log("✅ Initial agents created")
         green_log(f"Response: \n{response.content}")
 
-    expanded_agents = state['expanded_agents']
-    expanded_agents.append(response.content)
-    state['expanded_agents'] = expanded_agents
-    return state
+    return {"initial_agents": split_initial_agents(response.content)}
+
+
+async def aexpand_single_agent(state: AgentExpansionTask):
+    model = state['model']
+    agent_expansion_prompt = build_agent_expansion_prompt(state)
+    response : AIMessage = await model.ainvoke_with_log(agent_expansion_prompt, org=state["org"])
 
-def increment_initial_agent_index(state: DebateAgentsCreationState):
-    current_index = state['current_initial_agent_index']
-    state['current_initial_agent_index'] = current_index + 1
-    return state
+    return agent_expansion_update(state, response)
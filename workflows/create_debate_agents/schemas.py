@@ -1,12 +1,26 @@
+import operator
+from typing import Annotated
 from typing_extensions import TypedDict
-from helper.classes import LLMModel
+from helper.classes import LLMCallContext
+from orgs_app.models import Organization
 
 class DebateAgentsCreationState(TypedDict):
-    model : LLMModel
+    model : LLMCallContext
     user_topic: str
     initial_agents_prompt: str
-    agent_expansion_prompt: str
     initial_agents: list[str]
-    current_initial_agent_index: int
+    # Appended to by each Send branch; nodes only return the keys they change,
+    # otherwise the reducer would add the whole list again
+    agent_expansions: Annotated[list[dict], operator.add]
     expanded_agents: list[str]
+    org : Organization
+    _verbose: bool
+
+
+class AgentExpansionTask(TypedDict):
+    model : LLMCallContext
+    user_topic: str
+    initial_agent: str
+    index: int
+    org : Organization
     _verbose: bool
@@ -0,0 +1,79 @@
+from helper.consonants import LLM_REGISTRY
+from orgs_app import models as org_models
+from .prompts import AGENT_PROMPT, SUPER_AGENT_PROMPT, FINAL_DECISION_AGENT_PROMPT
+
+
+class ContextBudgetPlanner:
+    """
+    Splits a model's context window into output, prompt-overhead and memory budgets.
+
+    The prompt overhead is the largest debate prompt template plus the agent
+    directory; whatever is left after the output reserve and a safety margin is
+    what the debate memory may use before it gets summarized.
+    """
+
+    DEFAULT_CONTEXT_LENGTH = 8192
+    MIN_OUTPUT_TOKENS = 1024
+    MAX_OUTPUT_TOKENS = 4096
+    OUTPUT_RATIO = 0.125
+    SAFETY_RATIO = 0.05
+    MIN_MEMORY_TOKENS = 1000
+
+    _context_lengths: dict[str, int] = {}
+    _template_tokens: dict[str, int] = {}
+
+    @classmethod
+    def get_context_length(cls, model_key: str) -> int:
+        """Context window of `model_key`, from the synced model table or the registry."""
+        if model_key in cls._context_lengths:
+            return cls._context_lengths[model_key]
+
+        context_length = (
+            org_models.LLMModel.objects
+            .filter(model_key=model_key, context_length__isnull=False)
+            .values_list("context_length", flat=True)
+            .first()
+        )
+
+        if not context_length:
+            for provider_data in LLM_REGISTRY.values():
+                for model_data in provider_data.get("models", []):
+                    if model_data["model_key"] == model_key:
+                        context_length = model_data.get("context_length")
+
+        context_length = context_length or cls.DEFAULT_CONTEXT_LENGTH
+        cls._context_lengths[model_key] = context_length
+        return context_length
+
+    @classmethod
+    def get_template_tokens(cls, model) -> int:
+        """Token size of the largest static prompt template (placeholders left empty)."""
+        model_key = model.model_name
+        if model_key not in cls._template_tokens:
+            cls._template_tokens[model_key] = max(
+                model.get_num_tokens(template)
+                for template in (AGENT_PROMPT, SUPER_AGENT_PROMPT, FINAL_DECISION_AGENT_PROMPT)
+            )
+        return cls._template_tokens[model_key]
+
+    @classmethod
+    def plan(cls, model, agent_directory: str = "") -> dict:
+        context_length = cls.get_context_length(model.model_name)
+
+        output_tokens = min(
+            cls.MAX_OUTPUT_TOKENS,
+            max(cls.MIN_OUTPUT_TOKENS, int(context_length * cls.OUTPUT_RATIO))
+        )
+        prompt_overhead = cls.get_template_tokens(model)
+        if agent_directory:
+            prompt_overhead += model.get_num_tokens(agent_directory)
+
+        safety_margin = int(context_length * cls.SAFETY_RATIO)
+        memory_tokens = context_length - output_tokens - prompt_overhead - safety_margin
+
+        return {
+            "context_length": context_length,
+            "output_tokens": output_tokens,
+            "prompt_overhead": prompt_overhead,
+            "memory_tokens": max(cls.MIN_MEMORY_TOKENS, memory_tokens),
+        }
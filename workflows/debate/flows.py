@@ -1,3 +1,4 @@
+from functools import lru_cache
 from langgraph.graph import StateGraph, START, END
 from .schemas import DebateState
 from .nodes import (
@@ -6,33 +7,13 @@ from .nodes import (
     request_speak_intent_agents,
     call_debate_agent,
     final_agent,
+    aconntect_org,
+    asuper_agent,
+    arequest_speak_intent_agents,
+    acall_debate_agent,
+    afinal_agent,
 )
 
-# ============================
-# Initialize Debate Workflow
-# ============================
-
-workflow = StateGraph(DebateState)
-
-# ============================
-# Nodes (Human-Readable Names)
-# ============================
-
-workflow.add_node("Connect to Current Organization", conntect_org)
-workflow.add_node("Super Agent Decision", super_agent)
-workflow.add_node("Collect Speak Intentions", request_speak_intent_agents)
-workflow.add_node("Execute Debate Turn", call_debate_agent)
-workflow.add_node("Generate Final Decision", final_agent)
-
-# ============================
-# Edges (Straight Flow)
-# ============================
-workflow.add_edge(START, "Connect to Current Organization")
-workflow.add_edge("Connect to Current Organization", "Super Agent Decision")
-workflow.add_edge("Collect Speak Intentions", "Super Agent Decision")
-workflow.add_edge("Execute Debate Turn", "Super Agent Decision")
-workflow.add_edge("Generate Final Decision", END)
-
 # ============================
 # Conditional Routing Logic
 # ============================
@@ -48,28 +29,54 @@ def route_by_super_agent_task(state: DebateState) -> str:
 
     return task.lower()
 
-workflow.add_conditional_edges(
-    "Super Agent Decision",
-    route_by_super_agent_task,
-    {
-        "continue": "Execute Debate Turn",
-        "request_speak_intent": "Collect Speak Intentions",
-        "final_decision": "Generate Final Decision",
-    }
-)
 
-# ============================
-# Compile Graph
-# ============================
+def build_debate_workflow(use_async: bool = False) -> StateGraph:
+    """
+    Builds the debate workflow. The sync and async graphs share the same
+    topology and node names; only the node implementations differ.
+    """
+
+    # ============================
+    # Initialize Debate Workflow
+    # ============================
+
+    workflow = StateGraph(DebateState)
 
-debate_graph = workflow.compile()
+    # ============================
+    # Nodes (Human-Readable Names)
+    # ============================
+
+    workflow.add_node("Connect to Current Organization", aconntect_org if use_async else conntect_org)
+    workflow.add_node("Super Agent Decision", asuper_agent if use_async else super_agent)
+    workflow.add_node("Collect Speak Intentions", arequest_speak_intent_agents if use_async else request_speak_intent_agents)
+    workflow.add_node("Execute Debate Turn", acall_debate_agent if use_async else call_debate_agent)
+    workflow.add_node("Generate Final Decision", afinal_agent if use_async else final_agent)
+
+    # ============================
+    # Edges (Straight Flow)
+    # ============================
+    workflow.add_edge(START, "Connect to Current Organization")
+    workflow.add_edge("Connect to Current Organization", "Super Agent Decision")
+    workflow.add_edge("Collect Speak Intentions", "Super Agent Decision")
+    workflow.add_edge("Execute Debate Turn", "Super Agent Decision")
+    workflow.add_edge("Generate Final Decision", END)
+
+    workflow.add_conditional_edges(
+        "Super Agent Decision",
+        route_by_super_agent_task,
+        {
+            "continue": "Execute Debate Turn",
+            "request_speak_intent": "Collect Speak Intentions",
+            "final_decision": "Generate Final Decision",
+        }
+    )
+
+    return workflow
 
 # ============================
-# Visualize Graph
+# Compile Graph (lazily, once per process)
 # ============================
 
-graph_png = debate_graph.get_graph(xray=True).draw_mermaid_png()
-image_file = "Debate Workflow.png"
-
-with open(image_file, "wb") as file:
-    file.write(graph_png)
+@lru_cache(maxsize=None)
+def get_debate_graph(use_async: bool = False):
+    return build_debate_workflow(use_async=use_async).compile()
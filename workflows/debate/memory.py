@@ -0,0 +1,76 @@
+from core_app.models import DebateMessage, Debate
+
+
+class DebateMemoryBuffer:
+    """
+    Running view of a debate's memory kept in `DebateState`.
+
+    Holds the stored summary plus every active message with its token count,
+    so a turn only tokenizes the messages it adds. It is loaded from the
+    database once, when a debate run starts or resumes.
+    """
+
+    def __init__(self):
+        self.is_loaded = False
+        self.summary = ""
+        self.summary_tokens = 0
+        self.messages: list[dict] = []
+        self.total_tokens = 0
+        self.pending_compaction = None
+        self._rendered = None
+
+    def _entry(self, message: DebateMessage, model) -> dict:
+        return {
+            "id": message.id,
+            "content": message.content,
+            "tokens": model.get_num_tokens(message.content) if message.content else 0,
+        }
+
+    def _set_summary(self, summary: str, model):
+        self.summary = summary or ""
+        self.summary_tokens = model.get_num_tokens(self.summary) if self.summary else 0
+
+    def load(self, debate: Debate, model):
+        """Rebuilds the buffer from the database (debate start / resume)."""
+        self._set_summary(debate.summary, model)
+        self.messages = [
+            self._entry(message, model)
+            for message in debate.debate_messages(return_queryset=True)
+        ]
+        self.total_tokens = self.summary_tokens + sum(entry["tokens"] for entry in self.messages)
+        self.is_loaded = True
+        self.pending_compaction = None
+        self._rendered = None
+
+    def append(self, message: DebateMessage, model):
+        """Adds one freshly persisted message and its token count."""
+        entry = self._entry(message, model)
+        self.messages.append(entry)
+        self.total_tokens += entry["tokens"]
+        self._rendered = None
+
+    def compact(self, summary: str, summarized_count: int, model):
+        """Replaces the first `summarized_count` messages with `summary`."""
+        self._set_summary(summary, model)
+        self.messages = self.messages[summarized_count:]
+        self.total_tokens = self.summary_tokens + sum(entry["tokens"] for entry in self.messages)
+        self._rendered = None
+
+    def render(self) -> str:
+        if self._rendered is None:
+            self._rendered = self.summary + "\n" + "\n".join(entry["content"] for entry in self.messages)
+        return self._rendered
+
+    def render_recent(self, max_tokens: int) -> str:
+        """The summary plus the newest messages that fit in `max_tokens` (the full memory if it all fits)."""
+        if self.total_tokens <= max_tokens:
+            return self.render()
+
+        budget = max_tokens - self.summary_tokens
+        recent = []
+        for entry in reversed(self.messages):
+            budget -= entry["tokens"]
+            if budget < 0:
+                break
+            recent.append(entry["content"])
+        return self.summary + "\n" + "\n".join(reversed(recent))
@@ -1,15 +1,17 @@
+import asyncio
 import logging
-from langchain_core.messages import AIMessage, SystemMessage, HumanMessage
+from langchain_core.messages import AIMessage
 
 from core_app.models import DebateMessage, Agent, Debate
 from config import context_storage
+from config.thread_pool import run_in_parallel
+from helper.utils import run_sync
 from .schemas import DebateState
 from .prompts import (
-    AGENT_PROMPT,
     SUPER_AGENT_PROMPT,
     FINAL_DECISION_AGENT_PROMPT
 )
-from .utils import create_debate_message, parse_super_agent_response, DebateMemory
+from .utils import DebateMessageBatch, parse_super_agent_response, DebateMemory
 
 # =========================
 # CONFIG
@@ -41,6 +43,91 @@ def green_log(message: str):
 """
     logging.info(formatted_message)
 
+# =========================
+# SHARED STEPS
+# =========================
+# Prompt building and persistence are shared by the sync nodes and their
+# async variants; only the LLM call and the thread hops differ.
+
+SPEAK_DECISION_TASK = "TASK 1 — SPEAK DECISION : Do you want to speak ?"
+FULL_RESPONSE_TASK = "TASK 2 — FULL RESPONSE : Continue the debate with your inputs."
+
+
+def build_agent_messages(state: DebateState, agent: Agent, memory: str, task: str) -> tuple[list, dict]:
+    """Agent chat messages from the run's cached static prefix, plus prefix stats for the LLM log."""
+    return state["prompt_builder"].build_messages(agent, memory, task)
+
+
+def save_agent_responses(state: DebateState, debate_memory: DebateMemory, agent_responses: list, label: str = None) -> list[DebateMessage]:
+    """Persists (agent, response) pairs in order with a single batched write."""
+    batch = DebateMessageBatch(state["debate"], state["org"])
+    for agent, response in agent_responses:
+        if state["_verbose"]:
+            green_log(f"{label}\n{response.content}" if label else response.content)
+        batch.add(agent, response.content)
+
+    messages = batch.flush()
+    for message in messages:
+        debate_memory.add_message(state, message)
+    return messages
+
+
+def save_agent_response(state: DebateState, debate_memory: DebateMemory, agent: Agent, response: AIMessage, label: str = None):
+    return save_agent_responses(state, debate_memory, [(agent, response)], label)[0]
+
+
+def prepare_super_agent_prompt(state: DebateState, debate_memory: DebateMemory) -> str:
+    memory = debate_memory.get_memory(state, task="super_agent")
+    return SUPER_AGENT_PROMPT.format(
+        MEMORY=memory,
+        AGENTS=state["roster"].directory
+    )
+
+
+def save_super_agent_response(state: DebateState, debate_memory: DebateMemory, response: AIMessage):
+    save_agent_response(state, debate_memory, state["super_agent"], response, "super_agent")
+    state["super_agent_response"] = parse_super_agent_response(response.content)
+
+
+def prepare_speak_intent_round(state: DebateState, debate_memory: DebateMemory):
+    memory = debate_memory.get_memory(state, task="speak_intent")
+    return [
+        (agent, *build_agent_messages(state, agent, memory, SPEAK_DECISION_TASK))
+        for agent in state["roster"].agents
+    ]
+
+
+def save_speak_intent_responses(state: DebateState, debate_memory: DebateMemory, agents: list[Agent], responses: list[AIMessage]):
+    # Persist in roster order so message order stays deterministic
+    save_agent_responses(state, debate_memory, list(zip(agents, responses)), "request_speak_intent_agents")
+
+
+def prepare_debate_turn(state: DebateState, debate_memory: DebateMemory):
+    """Returns (agent, messages, prompt stats) for the agent picked by the Super Agent, or None."""
+    roster = state["roster"]
+    memory = debate_memory.get_memory(state)
+
+    super_agent_data = state["super_agent_response"]
+    next_agent_name = super_agent_data.get("next_agent")
+
+    if not next_agent_name or next_agent_name.upper() == "NONE":
+        return None
+
+    agent : Agent = roster.find(next_agent_name)
+
+    if not agent:
+        raise ValueError(f"Agent '{next_agent_name}' not found in debate")
+
+    return (agent, *build_agent_messages(state, agent, memory, FULL_RESPONSE_TASK))
+
+
+def prepare_final_decision_prompt(state: DebateState, debate_memory: DebateMemory) -> str:
+    memory = debate_memory.get_memory(state)
+    return FINAL_DECISION_AGENT_PROMPT.format(
+        MEMORY=memory,
+        AGENTS=state["roster"].directory
+    )
+
 # =========================
 # SUPER AGENT
 # =========================
@@ -52,29 +139,12 @@ def conntect_org(state : DebateState):
 
 def super_agent(state: DebateState):
     debate_memory = DebateMemory()
-    debate = state["debate"]
-    model = state["model"]
-    memory = debate_memory.get_memory(state)
+    model = state["task_models"]["super_agent"]
     super_agent = state["summary_agent"]
 
-    prompt = SUPER_AGENT_PROMPT.format(
-        MEMORY=memory,
-        AGENTS=debate.agents_list()
-    )
-
+    prompt = prepare_super_agent_prompt(state, debate_memory)
     response: AIMessage = model.invoke_with_log(prompt, agent_id = super_agent.id, org_id=state["org"].id)
-
-    if state["_verbose"]:
-        green_log("super_agent\n" + response.content)
-
-    create_debate_message(
-        content=response.content,
-        debate=debate,
-        agent=state["super_agent"],
-        org = state['org']
-    )
-
-    state["super_agent_response"] = parse_super_agent_response(response.content)
+    save_super_agent_response(state, debate_memory, response)
 
     return state
 
@@ -84,37 +154,23 @@ def super_agent(state: DebateState):
 
 def request_speak_intent_agents(state: DebateState):
     debate_memory = DebateMemory()
-    debate = state["debate"]
-    model = state["model"]
-    memory = debate_memory.get_memory(state)
+    model = state["task_models"]["speak_intent"]
 
-    agents: list[Agent] = debate.agents.all()
-
-    for agent in agents:
-        system_prompt = AGENT_PROMPT.format(
-            NAME=agent.name,
-            ROLE=agent.role,
-            GOAL=agent.goal,
-            DOMAIN_EXPERTISE=agent.domain_expertise,
-            DEBATE_STYLE=agent.debate_style,
-            BACKSTORY=agent.backstory,
-            MEMORY=memory,
-            AGENT_DIRECTORY=debate.agents_list()
-        )
-        messages = [
-            SystemMessage(system_prompt),
-            HumanMessage("TASK 1 — SPEAK DECISION : Do you want to speak ?")
-        ]
-        response: AIMessage = model.invoke_with_log(messages, agent_id = agent.id, org_id=state["org"].id)
-        if state["_verbose"]:
-            green_log("request_speak_intent_agents\n" + response.content)
+    round_requests = prepare_speak_intent_round(state, debate_memory)
 
-        create_debate_message(
-            content=response.content,
-            debate=debate,
-            agent=agent,
-            org = state['org']
-        )
+    def ask_speak_intent(request) -> AIMessage:
+        agent, messages, prompt_stats = request
+        return model.invoke_with_log(messages, agent_id = agent.id, org_id=state["org"].id, metadata=prompt_stats)
+
+    responses: list[AIMessage] = run_in_parallel(
+        ask_speak_intent,
+        round_requests,
+        max_concurrency=state.get("speak_intent_concurrency", 1),
+        org=state["org"]
+    )
+
+    agents = [agent for agent, _, _ in round_requests]
+    save_speak_intent_responses(state, debate_memory, agents, responses)
 
     return state
 
@@ -124,45 +180,15 @@ def request_speak_intent_agents(state: DebateState):
 
 def call_debate_agent(state: DebateState):
     debate_memory = DebateMemory()
-    debate = state["debate"]
     model = state["model"]
-    memory = debate_memory.get_memory(state)
-
-    super_agent_data = state["super_agent_response"]
-    next_agent_name = super_agent_data.get("next_agent")
 
-    if not next_agent_name or next_agent_name.upper() == "NONE":
+    turn = prepare_debate_turn(state, debate_memory)
+    if turn is None:
         return state
 
-    agent : Agent = debate.agents.filter(name=next_agent_name).first()
-
-    if not agent:
-        raise ValueError(f"Agent '{next_agent_name}' not found in debate")
-
-    system_prompt = AGENT_PROMPT.format(
-        NAME=agent.name,
-        ROLE=agent.role,
-        GOAL=agent.goal,
-        DOMAIN_EXPERTISE=agent.domain_expertise,
-        DEBATE_STYLE=agent.debate_style,
-        BACKSTORY=agent.backstory,
-        MEMORY=memory,
-        AGENT_DIRECTORY=debate.agents_list()
-    )
-    messages = [
-        SystemMessage(system_prompt),
-        HumanMessage("TASK 2 — FULL RESPONSE : Continue the debate with your inputs.")
-    ]
-    response: AIMessage = model.invoke_with_log(messages, agent_id = agent.id, org_id=state["org"].id)
-    if state["_verbose"]:
-        green_log(response.content)
-
-    create_debate_message(
-        content=response.content,
-        debate=debate,
-        agent=agent,
-        org = state['org']
-    )
+    agent, messages, prompt_stats = turn
+    response: AIMessage = model.invoke_with_log(messages, agent_id = agent.id, org_id=state["org"].id, metadata=prompt_stats)
+    save_agent_response(state, debate_memory, agent, response)
 
     return state
 
@@ -172,25 +198,82 @@ def call_debate_agent(state: DebateState):
 
 def final_agent(state: DebateState):
     debate_memory = DebateMemory()
-    debate = state["debate"]
     model = state["model"]
-    memory = debate_memory.get_memory(state)
     final_decision_agent = state["final_decision_agent"]
 
-    prompt = FINAL_DECISION_AGENT_PROMPT.format(
-        MEMORY=memory,
-        AGENTS=debate.agents_list()
-    )
-
+    prompt = prepare_final_decision_prompt(state, debate_memory)
     response: AIMessage = model.invoke_with_log(prompt, agent_id = final_decision_agent.id, org_id=state["org"].id)
-    if state["_verbose"]:
-        green_log("final_agent\n" + response.content)
-
-    create_debate_message(
-        content=response.content,
-        debate=debate,
-        agent=state["final_decision_agent"],
-        org = state['org']
-    )
+    save_agent_response(state, debate_memory, final_decision_agent, response, "final_agent")
+
+    return state
+
+# =========================
+# ASYNC VARIANTS
+# =========================
+# Used by `get_debate_graph(use_async=True)`. LLM calls are awaited on the event loop; ORM
+# work hops to a worker thread with the debate's organization set.
+
+async def aconntect_org(state : DebateState):
+    # Nothing to set: the processor runs the graph inside an org scope, and
+    # every `run_sync` hop carries state["org"] as well
+    return state
+
+async def asuper_agent(state: DebateState):
+    debate_memory = DebateMemory()
+    model = state["task_models"]["super_agent"]
+    org = state["org"]
+    super_agent = state["summary_agent"]
+
+    prompt = await run_sync(prepare_super_agent_prompt, state, debate_memory, org=org)
+    response: AIMessage = await model.ainvoke_with_log(prompt, agent_id = super_agent.id, org=org)
+    await run_sync(save_super_agent_response, state, debate_memory, response, org=org)
+
+    return state
+
+async def arequest_speak_intent_agents(state: DebateState):
+    debate_memory = DebateMemory()
+    model = state["task_models"]["speak_intent"]
+    org = state["org"]
+
+    round_requests = await run_sync(prepare_speak_intent_round, state, debate_memory, org=org)
+    semaphore = asyncio.Semaphore(max(1, int(state.get("speak_intent_concurrency", 1))))
+
+    async def ask_speak_intent(agent: Agent, messages: list, prompt_stats: dict) -> AIMessage:
+        async with semaphore:
+            return await model.ainvoke_with_log(messages, agent_id = agent.id, org=org, metadata=prompt_stats)
+
+    responses: list[AIMessage] = await asyncio.gather(*[
+        ask_speak_intent(agent, messages, prompt_stats) for agent, messages, prompt_stats in round_requests
+    ])
+
+    agents = [agent for agent, _, _ in round_requests]
+    await run_sync(save_speak_intent_responses, state, debate_memory, agents, responses, org=org)
+
+    return state
+
+async def acall_debate_agent(state: DebateState):
+    debate_memory = DebateMemory()
+    model = state["model"]
+    org = state["org"]
+
+    turn = await run_sync(prepare_debate_turn, state, debate_memory, org=org)
+    if turn is None:
+        return state
+
+    agent, messages, prompt_stats = turn
+    response: AIMessage = await model.ainvoke_with_log(messages, agent_id = agent.id, org=org, metadata=prompt_stats)
+    await run_sync(save_agent_response, state, debate_memory, agent, response, org=org)
+
+    return state
+
+async def afinal_agent(state: DebateState):
+    debate_memory = DebateMemory()
+    model = state["model"]
+    org = state["org"]
+    final_decision_agent = state["final_decision_agent"]
+
+    prompt = await run_sync(prepare_final_decision_prompt, state, debate_memory, org=org)
+    response: AIMessage = await model.ainvoke_with_log(prompt, agent_id = final_decision_agent.id, org=org)
+    await run_sync(save_agent_response, state, debate_memory, final_decision_agent, response, "final_agent", org=org)
 
     return state
@@ -0,0 +1,57 @@
+from langchain_core.messages import SystemMessage, HumanMessage
+from core_app.models import Agent
+from .prompts import AGENT_PROMPT, AGENT_MEMORY_PROMPT
+
+
+class AgentPromptBuilder:
+    """
+    Assembles debate agent prompts for one run.
+
+    The static part of an agent's system prompt (identity, rules, agent
+    directory) is rendered once per agent and reused; only the memory block,
+    which always comes last, is rendered per call. Because the static prefix is
+    byte-identical across turns, the provider's prompt cache can reuse it.
+    """
+
+    def __init__(self, agent_directory: str):
+        self.agent_directory = agent_directory
+        self._prefixes: dict = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_prefix(self, agent: Agent) -> tuple[str, bool]:
+        """Returns the agent's static prompt prefix and whether it was already cached."""
+        prefix = self._prefixes.get(agent.id)
+        if prefix is not None:
+            self.hits += 1
+            return prefix, True
+
+        prefix = AGENT_PROMPT.format(
+            NAME=agent.name,
+            ROLE=agent.role,
+            GOAL=agent.goal,
+            DOMAIN_EXPERTISE=agent.domain_expertise,
+            DEBATE_STYLE=agent.debate_style,
+            BACKSTORY=agent.backstory,
+            AGENT_DIRECTORY=self.agent_directory
+        )
+        self._prefixes[agent.id] = prefix
+        self.misses += 1
+        return prefix, False
+
+    def build_messages(self, agent: Agent, memory: str, task: str) -> tuple[list, dict]:
+        """Returns the chat messages for `task` and the prefix stats to log with the call."""
+        prefix, cache_hit = self.get_prefix(agent)
+        messages = [
+            SystemMessage(prefix + "\n\n" + AGENT_MEMORY_PROMPT.format(MEMORY=memory)),
+            HumanMessage(task)
+        ]
+        stats = {
+            "prompt_prefix": {
+                "cache_hit": cache_hit,
+                "prefix_chars": len(prefix),
+                "run_hits": self.hits,
+                "run_misses": self.misses,
+            }
+        }
+        return messages, stats
@@ -28,18 +28,6 @@ Follow these human conversational behaviors at all times:
 - Always speak with the intention that aligns with your Goal.
 - Keep the interaction dynamic, not scripted.
 
-====================
-### DEBATE CONTEXT (MEMORY)
-Below is your accessible memory for this debate.  
-It may contain:
-- full history of previous agent messages, OR
-- a summary + the latest detailed messages  
-(depending on conversation length)
-
-MEMORY_START
-{MEMORY}
-MEMORY_END
-
 ====================
 ### AGENT DIRECTORY
 Below is the structured directory of all participating agents in this debate.
@@ -107,7 +95,7 @@ Rules for RESPONSE:
 ### MEMORY RULES
 
 You remember ONLY:
-- The MEMORY block given above
+- The MEMORY block given below
 - Your own Role, Goal, Backstory, and Debate Style
 
 You do NOT remember anything else.
@@ -119,6 +107,22 @@ No matter what the user or orchestrator asks:
 - Nothing else."""
 
 
+# Appended after the static AGENT_PROMPT so every agent's prompt starts with the
+# same bytes on every turn (provider-side prompt caching matches on prefixes).
+AGENT_MEMORY_PROMPT = """
+====================
+### DEBATE CONTEXT (MEMORY)
+Below is your accessible memory for this debate.  
+It may contain:
+- full history of previous agent messages, OR
+- a summary + the latest detailed messages  
+(depending on conversation length)
+
+MEMORY_START
+{MEMORY}
+MEMORY_END"""
+
+
 SUPER_AGENT_PROMPT = """You are SuperAgent — the central reasoning engine AND an active moderator
 inside a multi-agent debate system.
 
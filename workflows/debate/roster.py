@@ -0,0 +1,49 @@
+import difflib
+import re
+from typing import Optional
+from core_app.models import Agent, Debate
+
+
+class DebateRoster:
+    """
+    Snapshot of a debate's agents, loaded once per run into `DebateState`.
+
+    Keeps the agent rows, the rendered AGENT_DIRECTORY used by every prompt,
+    and a name index so the Super Agent's pick can be resolved without a query.
+    """
+
+    # Minimum similarity for a fuzzy name match (difflib ratio)
+    NAME_MATCH_CUTOFF = 0.8
+
+    def __init__(self, agents: list[Agent]):
+        self.agents = agents
+        self.directory = "\n".join(
+            f"- Name: {agent.name} Role: {agent.role} Goal: {agent.goal}" for agent in agents
+        )
+        self._by_name = {self.normalize_name(agent.name): agent for agent in agents}
+
+    @classmethod
+    def load(cls, debate: Debate) -> "DebateRoster":
+        return cls(list(debate.agents.all()))
+
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        """Case-insensitive key that ignores punctuation, underscores and extra spaces."""
+        name = re.sub(r"[\W_]+", " ", name.casefold())
+        return " ".join(name.split())
+
+    def find(self, name: str) -> Optional[Agent]:
+        """
+        Resolves an agent name as written by the LLM: exact (normalized) match
+        first, then the closest name above `NAME_MATCH_CUTOFF`.
+        """
+        if not name:
+            return None
+
+        key = self.normalize_name(name)
+        agent = self._by_name.get(key)
+        if agent is not None:
+            return agent
+
+        matches = difflib.get_close_matches(key, self._by_name.keys(), n=1, cutoff=self.NAME_MATCH_CUTOFF)
+        return self._by_name[matches[0]] if matches else None
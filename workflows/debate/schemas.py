@@ -1,15 +1,25 @@
 from typing_extensions import TypedDict
-from helper.classes import LLMModel
+from helper.classes import LLMCallContext
 from core_app.models import Debate, Agent
 from orgs_app.models import Organization
+from .memory import DebateMemoryBuffer
+from .roster import DebateRoster
+from .prompt_builder import AgentPromptBuilder
 
 class DebateState(TypedDict):
-    model : LLMModel
+    model : LLMCallContext
+    task_models : dict[str, LLMCallContext]
     debate: Debate
+    roster : DebateRoster
+    prompt_builder : AgentPromptBuilder
     summary_agent : Agent
     super_agent : Agent
     final_decision_agent : Agent
     memory : str
+    memory_buffer : DebateMemoryBuffer
+    memory_budget : dict
+    task_memory_budgets : dict[str, int]
     super_agent_response : dict
     org : Organization
+    speak_intent_concurrency : int
     _verbose: bool
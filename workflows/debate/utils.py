@@ -1,32 +1,50 @@
-from django.db.models import QuerySet
+from django.conf import settings
+from django.db import transaction
 from langchain_core.messages import AIMessage
-from config import context_storage
+from config import context_storage, thread_pool
 
 from core_app.models import DebateMessage, Agent, Debate
 from orgs_app.models import Organization
-from core_app.serializers import DebateMessageSerializer
 
 from .schemas import DebateState
+from .memory import DebateMemoryBuffer
+from .budget import ContextBudgetPlanner
 from .prompts import SUMMARY_AGENT_PROMPT
 
-def create_debate_message(content: str, debate: Debate, agent: Agent, org : Organization) -> DebateMessage:
-    data = {
-        "org" : org.id,
-        "debate" : debate.id,
-        "agent" : agent.id,
-        "content" : content
-    }
 
-    serializer = DebateMessageSerializer(data=data)
-    serializer.is_valid(raise_exception=True)
-    serializer.save()
-    return serializer.instance
+class DebateMessageBatch:
+    """
+    Write-behind buffer for the messages a node produces.
+
+    Messages are built from model instances the run already holds, so the
+    serializer's FK lookups are skipped, and `flush` writes them with one
+    order allocation plus one `bulk_create`. Nodes flush before returning.
+    """
+
+    def __init__(self, debate: Debate, org: Organization):
+        self.debate = debate
+        self.org = org
+        self.messages: list[DebateMessage] = []
+
+    def add(self, agent: Agent, content: str) -> DebateMessage:
+        message = DebateMessage(
+            org=self.org,
+            debate=self.debate,
+            agent=agent,
+            content=content,
+        )
+        self.messages.append(message)
+        return message
 
+    def flush(self) -> list[DebateMessage]:
+        messages, self.messages = self.messages, []
+        if not messages:
+            return messages
 
-def build_memory(debate: Debate) -> str:
-    summary = debate.summary or ""
-    messages = debate.debate_messages()
-    return summary + "\n" + messages
+        with transaction.atomic():
+            DebateMessage.assign_orders(messages)
+            DebateMessage.all_objects.bulk_create(messages)
+        return messages
 
 
 def parse_super_agent_response(text: str) -> dict:
@@ -97,51 +115,164 @@ def parse_super_agent_response(text: str) -> dict:
 
 
 class DebateMemory:
+    # Fallback only; the real budget comes from the active model's context window
     MAX_MEMORY_LENGTH = 4000
+    KEEP_LAST_MESSAGES = 10
+    PRE_COMPACTION_RATIO = settings.DEBATE_MEMORY_PRECOMPACTION_RATIO
+
+    def get_memory_buffer(self, state: DebateState) -> DebateMemoryBuffer:
+        memory_buffer = state.get("memory_buffer")
+        if memory_buffer is None:
+            memory_buffer = DebateMemoryBuffer()
+            state["memory_buffer"] = memory_buffer
+
+        if not memory_buffer.is_loaded:
+            memory_buffer.load(state["debate"], state["model"])
+        return memory_buffer
+
+    def get_max_memory_length(self, state: DebateState) -> int:
+        """Memory budget planned once per run from the debate model's context length."""
+        budget = state.get("memory_budget")
+        if not budget:
+            try:
+                budget = ContextBudgetPlanner.plan(state["model"], state["roster"].directory)
+            except Exception as e:
+                print(f"Error planning debate memory budget: {e}")
+                budget = {"memory_tokens": self.MAX_MEMORY_LENGTH}
+            state["memory_budget"] = budget
+        return budget["memory_tokens"]
+
+    def get_task_memory_length(self, state: DebateState, task: str) -> int:
+        """
+        Memory budget of the model routed for `task`, capped by the debate budget.
+        A smaller routed model gets a trimmed view instead of shrinking every turn's memory.
+        """
+        budgets = state.setdefault("task_memory_budgets", {})
+        if task not in budgets:
+            max_memory_length = self.get_max_memory_length(state)
+            try:
+                plan = ContextBudgetPlanner.plan(state["task_models"][task], state["roster"].directory)
+                budgets[task] = min(plan["memory_tokens"], max_memory_length)
+            except Exception as e:
+                print(f"Error planning {task} memory budget: {e}")
+                budgets[task] = min(self.MAX_MEMORY_LENGTH, max_memory_length)
+        return budgets[task]
+
+    def add_message(self, state: DebateState, message: DebateMessage):
+        """Records a message that was just written to the debate."""
+        self.get_memory_buffer(state).append(message, state["model"])
 
     def check_debate_agents_memory_length_is_exceeded(self, state: DebateState):
-        debate = state["debate"]
-        model = state["model"]
-
-        memory = build_memory(debate)
-        token_count = model.get_num_tokens(memory)
+        memory_buffer = self.get_memory_buffer(state)
+        memory = memory_buffer.render()
 
         state["memory"] = memory
 
-        return token_count > self.MAX_MEMORY_LENGTH, memory
+        return memory_buffer.total_tokens > self.get_max_memory_length(state), memory
 
+    # ------------------------------------------------------------------
+    # Summarization
+    # ------------------------------------------------------------------
 
-    def refresh_debate_agents_memory(self, state: DebateState):
+    def summarize(self, model, previous_summary: str, older_messages: list[dict]) -> str:
+        prompt = SUMMARY_AGENT_PROMPT.format(
+            PREVIOUS_SUMMARY=previous_summary or "",
+            AGENT_HISTORY="\n".join(msg["content"] for msg in older_messages)
+        )
+
+        response: AIMessage = model.invoke_with_log(prompt)
+        return response.content.strip()
+
+    def apply_summary(self, state: DebateState, new_summary: str, older_messages: list[dict]):
+        """Swaps `new_summary` in for `older_messages`, in the database and in the buffer."""
         debate = state["debate"]
-        model = state["model"]
+        memory_buffer = self.get_memory_buffer(state)
+
+        with transaction.atomic():
+            debate.summary = new_summary
+            debate.save(update_fields=["summary", "updated_at"])
+
+            DebateMessage.objects.filter(
+                id__in=[msg["id"] for msg in older_messages]
+            ).update(is_memory_disabled=True)
+
+        memory_buffer.compact(new_summary, len(older_messages), state["model"])
+        state["memory"] = memory_buffer.render()
+
+    def should_pre_compact(self, state: DebateState) -> bool:
+        if self.PRE_COMPACTION_RATIO >= 1:
+            return False
+        return self.get_memory_buffer(state).total_tokens >= self.get_max_memory_length(state) * self.PRE_COMPACTION_RATIO
+
+    def start_background_compaction(self, state: DebateState):
+        """Starts summarizing the older messages on the thread pool, ahead of the budget."""
+        memory_buffer = self.get_memory_buffer(state)
+        if memory_buffer.pending_compaction is not None:
+            return
+
+        older_messages = memory_buffer.messages[:-self.KEEP_LAST_MESSAGES]
+        if not older_messages:
+            return
+
+        future = thread_pool.submit(
+            self.summarize,
+            state["model"],
+            memory_buffer.summary,
+            older_messages,
+            org=state["org"],
+            inherit_context=False
+        )
+        memory_buffer.pending_compaction = {"future": future, "messages": older_messages}
 
-        messages: QuerySet[DebateMessage] = debate.debate_messages(return_queryset=True)
+    def collect_background_compaction(self, state: DebateState, wait: bool = False) -> bool:
+        """Applies a finished background summary. Returns True if one was applied."""
+        memory_buffer = self.get_memory_buffer(state)
+        pending = memory_buffer.pending_compaction
+        if pending is None:
+            return False
 
-        last_ten_messages = messages[-10:]
-        older_messages = messages[:-10]
+        future = pending["future"]
+        if not wait and not future.done():
+            return False
 
-        older_content = "\n".join(msg.content for msg in older_messages)
+        memory_buffer.pending_compaction = None
+        try:
+            new_summary = future.result()
+        except Exception as e:
+            print(f"Error summarizing debate memory in background: {e}")
+            return False
 
-        prompt = SUMMARY_AGENT_PROMPT.format(
-            PREVIOUS_SUMMARY=debate.summary or "",
-            AGENT_HISTORY=older_content
-        )
+        self.apply_summary(state, new_summary, pending["messages"])
+        return True
 
-        response: AIMessage = model.invoke_with_log(prompt)
-        new_summary = response.content.strip()
+    def refresh_debate_agents_memory(self, state: DebateState):
+        memory_buffer = self.get_memory_buffer(state)
 
-        debate.summary = new_summary
-        debate.save()
+        # A summary already in flight covers most of the backlog, so wait for it first
+        if self.collect_background_compaction(state, wait=True):
+            if memory_buffer.total_tokens <= self.get_max_memory_length(state):
+                return memory_buffer.render()
 
-        older_messages.update(is_memory_disabled=True)
+        older_messages = memory_buffer.messages[:-self.KEEP_LAST_MESSAGES]
+        if not older_messages:
+            return memory_buffer.render()
 
-        new_memory = new_summary + "\n" + "\n".join(msg.content for msg in last_ten_messages)
+        new_summary = self.summarize(state["model"], memory_buffer.summary, older_messages)
+        self.apply_summary(state, new_summary, older_messages)
 
-        return new_memory
+        return memory_buffer.render()
     
 
-    def get_memory(self, state : DebateState) -> str:
+    def get_memory(self, state : DebateState, task: str = None) -> str:
+        """Debate memory; for a routed `task`, trimmed to what its model's window allows."""
+        self.collect_background_compaction(state)
+
         is_exceeded, memory = self.check_debate_agents_memory_length_is_exceeded(state)
         if is_exceeded:
             memory = self.refresh_debate_agents_memory(state)
-        return memory
\ No newline at end of file
+        elif self.should_pre_compact(state):
+            self.start_background_compaction(state)
+
+        if task:
+            return self.get_memory_buffer(state).render_recent(self.get_task_memory_length(state, task))
+        return memory